@@ -11,6 +11,11 @@ This demonstrates:
 import asyncio
 import httpx
 
+try:
+    import orjson as _json  # Optional: faster decoding of large /torrents listings
+except ImportError:
+    import json as _json
+
 
 API_BASE_URL = "http://localhost:8000"
 
@@ -20,19 +25,25 @@ async def main():
     print("Torrent Manager API Key Authentication Example")
     print("=" * 60)
 
-    # Step 1: Login with username/password to create API key
-    print("\n1. Logging in with username/password...")
+    # A single client is shared by every step so the connection pool (and the
+    # session cookie from the login) is reused instead of reconnecting each time.
     async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
-        # Register a user (or use existing)
-        try:
-            await client.post("/auth/register", json={
-                "username": "api_user",
-                "password": "secure_pass_123",
-                "email": "api@example.com"
-            })
+        # Step 1: Login with username/password to create API key
+        print("\n1. Logging in with username/password...")
+
+        # Register a user (or use existing). Connection errors propagate to the
+        # handler below; a 400 means the username is already taken.
+        register_response = await client.post("/auth/register", json={
+            "username": "api_user",
+            "password": "secure_pass_123",
+            "email": "api@example.com"
+        })
+        if register_response.status_code == 200:
             print("✓ User registered")
-        except:
-            pass  # User might already exist
+        elif register_response.status_code == 400:
+            print("✓ User already exists")
+        else:
+            register_response.raise_for_status()
 
         # Login
         login_response = await client.post("/auth/login", json={
@@ -58,8 +69,9 @@ async def main():
             print("✗ Failed to create API key")
             return
 
-        api_key_data = create_key_response.json()
+        api_key_data = _json.loads(create_key_response.content)
         api_key = api_key_data["api_key"]
+        api_key_headers = {"Authorization": f"Bearer {api_key}"}
 
         print("✓ API key created successfully")
         print(f"  Name: {api_key_data['name']}")
@@ -67,17 +79,20 @@ async def main():
         print(f"  Expires: {api_key_data['expires_at']}")
         print("\n  ⚠️  Store this API key securely - it won't be shown again!")
 
-    # Step 3: Use the API key to access protected endpoints
-    print("\n3. Using API key to access protected endpoints...")
-    async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
-        # Access /auth/me with API key
-        me_response = await client.get(
-            "/auth/me",
-            headers={"Authorization": f"Bearer {api_key}"}
+        # Step 3: Use the API key to access protected endpoints
+        # (the API key is checked before the session cookie)
+        print("\n3. Using API key to access protected endpoints...")
+
+        # The /auth/me, /torrents and key-listing requests are independent,
+        # so issue them concurrently and inspect each response afterwards
+        me_response, torrents_response, list_response = await asyncio.gather(
+            client.get("/auth/me", headers=api_key_headers),
+            client.get("/torrents", headers=api_key_headers),
+            client.get("/auth/api-keys", headers=api_key_headers),
         )
 
         if me_response.status_code == 200:
-            user_data = me_response.json()
+            user_data = _json.loads(me_response.content)
             print("✓ Successfully authenticated with API key")
             print(f"  Username: {user_data['username']}")
             print(f"  Auth method: {user_data['auth_method']}")
@@ -85,28 +100,17 @@ async def main():
             print("✗ Failed to authenticate with API key")
             return
 
-        # Access /torrents endpoint
-        torrents_response = await client.get(
-            "/torrents",
-            headers={"Authorization": f"Bearer {api_key}"}
-        )
-
         if torrents_response.status_code == 200:
             print("✓ Successfully accessed /torrents endpoint")
-            print(f"  Response: {torrents_response.json()}")
+            print(f"  Response: {_json.loads(torrents_response.content)}")
         else:
             print("✗ Failed to access /torrents endpoint")
 
-    # Step 4: List API keys
-    print("\n4. Listing API keys...")
-    async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
-        list_response = await client.get(
-            "/auth/api-keys",
-            headers={"Authorization": f"Bearer {api_key}"}
-        )
+        # Step 4: List API keys
+        print("\n4. Listing API keys...")
 
         if list_response.status_code == 200:
-            keys = list_response.json()["api_keys"]
+            keys = _json.loads(list_response.content)["api_keys"]
             print(f"✓ Found {len(keys)} API key(s)")
             for key in keys:
                 print(f"  - {key['name']} ({key['api_key_id']})")
@@ -115,17 +119,9 @@ async def main():
                     print(f"    Last used: {key['last_used_at']}")
                 print(f"    Revoked: {key['revoked']}")
 
-    # Step 5: Revoke the API key
-    print("\n5. Revoking API key...")
-    key_prefix = api_key[:8]
-    async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
-        # Use session auth to revoke (login again)
-        await client.post("/auth/login", json={
-            "username": "api_user",
-            "password": "secure_pass_123",
-            "remember_me": False
-        })
-
+        # Step 5: Revoke the API key (the session cookie from step 1 is still set)
+        print("\n5. Revoking API key...")
+        key_prefix = api_key[:8]
         revoke_response = await client.delete(f"/auth/api-keys/{key_prefix}")
 
         if revoke_response.status_code == 200:
@@ -136,11 +132,9 @@ async def main():
         # Try to use the revoked key
         print("\n6. Attempting to use revoked API key...")
 
-    async with httpx.AsyncClient(base_url=API_BASE_URL) as client:
-        test_response = await client.get(
-            "/auth/me",
-            headers={"Authorization": f"Bearer {api_key}"}
-        )
+        # Drop the session cookie so only the revoked API key is presented
+        client.cookies.clear()
+        test_response = await client.get("/auth/me", headers=api_key_headers)
 
         if test_response.status_code == 401:
             print("✓ Correctly denied access with revoked key")
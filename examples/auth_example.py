@@ -12,6 +12,11 @@ This demonstrates:
 import asyncio
 import httpx
 
+try:
+    import orjson as _json  # Optional: faster decoding of large /torrents listings
+except ImportError:
+    import json as _json
+
 
 API_BASE_URL = "http://localhost:8000"
 
@@ -35,9 +40,9 @@ async def main():
 
         if register_response.status_code == 200:
             print("✓ User registered successfully")
-            print(f"  User ID: {register_response.json()['user_id']}")
+            print(f"  User ID: {_json.loads(register_response.content)['user_id']}")
         else:
-            print(f"✗ Registration failed: {register_response.json()}")
+            print(f"✗ Registration failed: {_json.loads(register_response.content)}")
             return
 
         # 2. Login with username/password
@@ -56,15 +61,20 @@ async def main():
             print(f"  Session cookie: {client.cookies.get('session')[:20]}...")
             print(f"  Remember-me cookie: {client.cookies.get('remember_me')[:20]}...")
         else:
-            print(f"✗ Login failed: {login_response.json()}")
+            print(f"✗ Login failed: {_json.loads(login_response.content)}")
             return
 
+        # /auth/me and /torrents are independent, so request them concurrently
+        me_response, torrents_response = await asyncio.gather(
+            client.get("/auth/me"),
+            client.get("/torrents"),
+        )
+
         # 3. Access protected endpoint (get current user)
         print("\n3. Accessing protected endpoint /auth/me...")
-        me_response = await client.get("/auth/me")
 
         if me_response.status_code == 200:
-            user_data = me_response.json()
+            user_data = _json.loads(me_response.content)
             print("✓ Successfully accessed protected endpoint")
             print(f"  Username: {user_data['username']}")
             print(f"  Email: {user_data['email']}")
@@ -75,11 +85,10 @@ async def main():
 
         # 4. Access another protected endpoint (list torrents)
         print("\n4. Accessing /torrents endpoint...")
-        torrents_response = await client.get("/torrents")
 
         if torrents_response.status_code == 200:
             print("✓ Successfully accessed torrents endpoint")
-            print(f"  Response: {torrents_response.json()}")
+            print(f"  Response: {_json.loads(torrents_response.content)}")
         else:
             print(f"✗ Failed to access torrents endpoint")
 
@@ -26,7 +26,13 @@ Example usage:
     python run.py
 """
 
+import os
+
 from torrent_manager.callbacks import TorrentCallback, TorrentInfo
+from torrent_manager.logger import logger
+
+
+_MB = 1 << 20
 
 
 class LoggingCallback(TorrentCallback):
@@ -39,50 +45,54 @@ class LoggingCallback(TorrentCallback):
 
     async def on_added(self, torrent_info: TorrentInfo) -> None:
         """Called when a torrent is added to a server."""
-        print(f"[ADDED] {torrent_info.name}")
-        print(f"  Hash: {torrent_info.info_hash}")
-        print(f"  Server: {torrent_info.server_name} ({torrent_info.server_type})")
-        print(f"  Size: {torrent_info.size / 1024 / 1024:.2f} MB")
+        logger.info(
+            "torrent.added {} hash={} server={} ({}) size_mb={:.2f}",
+            torrent_info.name, torrent_info.info_hash,
+            torrent_info.server_name, torrent_info.server_type,
+            torrent_info.size / _MB,
+        )
 
     async def on_started(self, torrent_info: TorrentInfo) -> None:
         """Called when a torrent is started/resumed."""
-        print(f"[STARTED] {torrent_info.name}")
-        print(f"  Progress: {torrent_info.progress:.1f}%")
+        logger.info("torrent.started {} progress={:.1f}%", torrent_info.name, torrent_info.progress)
 
     async def on_stopped(self, torrent_info: TorrentInfo) -> None:
         """Called when a torrent is paused/stopped."""
-        print(f"[STOPPED] {torrent_info.name}")
-        print(f"  Progress: {torrent_info.progress:.1f}%")
+        logger.info("torrent.stopped {} progress={:.1f}%", torrent_info.name, torrent_info.progress)
 
     async def on_completed(self, torrent_info: TorrentInfo) -> None:
         """Called when a torrent finishes downloading (reaches 100%)."""
-        print(f"[COMPLETED] {torrent_info.name}")
-        print(f"  Size: {torrent_info.size / 1024 / 1024:.2f} MB")
-        print(f"  Path: {torrent_info.base_path}")
-        print(f"  Private: {torrent_info.is_private}")
+        logger.info(
+            "torrent.completed {} size_mb={:.2f} path={} private={}",
+            torrent_info.name, torrent_info.size / _MB,
+            torrent_info.base_path, torrent_info.is_private,
+        )
 
         # Access database records
         if torrent_info.db_server:
-            print(f"  Server auto-download: {torrent_info.db_server.get('auto_download_enabled')}")
+            logger.info(
+                "torrent.completed {} server_auto_download={}",
+                torrent_info.name, torrent_info.db_server.get('auto_download_enabled'),
+            )
 
     async def on_removed(self, torrent_info: TorrentInfo) -> None:
         """Called when a torrent is removed from a server."""
-        print(f"[REMOVED] {torrent_info.name}")
-        print(f"  Final progress: {torrent_info.progress:.1f}%")
+        logger.info("torrent.removed {} final_progress={:.1f}%", torrent_info.name, torrent_info.progress)
 
     async def on_error(self, torrent_info: TorrentInfo) -> None:
         """Called when an error occurs with a torrent."""
-        print(f"[ERROR] {torrent_info.name}")
-        print(f"  Error: {torrent_info.error_message}")
+        logger.error("torrent.error {} error={}", torrent_info.name, torrent_info.error_message)
 
     async def on_transfer_started(self, torrent_info: TorrentInfo) -> None:
         """Called when file transfer to local storage begins."""
-        print(f"[TRANSFER STARTED] {torrent_info.name}")
-        print(f"  Size: {torrent_info.size / 1024 / 1024:.2f} MB")
+        logger.info(
+            "torrent.transfer_started {} size_mb={:.2f}",
+            torrent_info.name, torrent_info.size / _MB,
+        )
 
     async def on_transfer_completed(self, torrent_info: TorrentInfo) -> None:
         """Called when file transfer to local storage finishes."""
-        print(f"[TRANSFER COMPLETED] {torrent_info.name}")
+        logger.info("torrent.transfer_completed {}", torrent_info.name)
 
 
 class NotificationCallback(TorrentCallback):
@@ -127,16 +137,16 @@ class MediaProcessingCallback(TorrentCallback):
     """
 
     # File extensions to process
-    MEDIA_EXTENSIONS = {'.mkv', '.mp4', '.avi', '.mov', '.m4v'}
+    MEDIA_EXTENSIONS = frozenset({'.mkv', '.mp4', '.avi', '.mov', '.m4v'})
 
     async def on_transfer_completed(self, torrent_info: TorrentInfo) -> None:
         """Trigger media processing after transfer completes."""
         # Check if this looks like media content
-        name_lower = torrent_info.name.lower()
-        is_media = any(name_lower.endswith(ext) for ext in self.MEDIA_EXTENSIONS)
+        ext = os.path.splitext(torrent_info.name)[1].lower()
+        is_media = ext in self.MEDIA_EXTENSIONS
 
         if is_media:
-            print(f"[MEDIA] Would process: {torrent_info.name}")
+            logger.info("media.would_process {}", torrent_info.name)
             # Example: Trigger Plex scan, rename files, etc.
             # import asyncio
             # await asyncio.create_subprocess_exec(
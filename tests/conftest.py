@@ -1,15 +1,131 @@
+import hashlib
+import os
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+
+# Cheapest bcrypt work factor for hashes made during tests; must be set
+# before torrent_manager.config is first imported
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
 import pytest
 from torrent_manager.docker_rtorrent import DockerRTorrent
 from torrent_manager.rtorrent_client import RTorrentClient
 from torrent_manager.config import Config
+from torrent_manager.auth import hash_password, verify_password
 
-@pytest.fixture(scope="session")
-def docker_rtorrent():
+
+TEST_PASSWORD = "testpass123"
+
+# Durability is irrelevant for throwaway in-memory test databases. The journal
+# stays in memory rather than off so per-test rollbacks still work; WAL does
+# not apply to in-memory databases.
+TEST_DB_PRAGMAS = {
+    'journal_mode': 'memory',
+    'synchronous': 0,
+    'locking_mode': 'exclusive',
+    'temp_store': 'memory',
+    'cache_size': -64000,
+}
+
+RPC_URL = "http://localhost:9080/RPC2"
+DEBIAN_TORRENT = "assets/debian-12.6.0-amd64-netinst.iso.torrent"
+READY_TIMEOUT = 60
+
+_container_executor = ThreadPoolExecutor(max_workers=1)
+_container_future = None
+
+
+def _start_container():
     container = DockerRTorrent(
         ports={'80/tcp': 9080},
         is_test=True,
     )
-    container.start(wait_time=15)
+    container.start(wait_time=0)
+    try:
+        _wait_for_rpc(RPC_URL)
+    except Exception:
+        container.stop()
+        raise
+    return container
+
+
+def _container_boot():
+    """Return the future for the shared container, submitting its boot once."""
+    global _container_future
+    if _container_future is None:
+        _container_future = _container_executor.submit(_start_container)
+    return _container_future
+
+
+def wait_until(predicate, timeout=30, interval=0.1):
+    """
+    Poll predicate until it returns a truthy value and return that value.
+
+    Exceptions count as "not ready yet". Once the timeout passes, the last
+    exception is re-raised, or the last falsy value returned for the caller
+    to assert on.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = predicate()
+            if result:
+                return result
+        except Exception:
+            if time.monotonic() >= deadline:
+                raise
+        else:
+            if time.monotonic() >= deadline:
+                return result
+        time.sleep(interval)
+
+
+def _wait_for_rpc(url, timeout=READY_TIMEOUT):
+    """Poll rTorrent's XML-RPC endpoint until it answers or the timeout passes."""
+    wait_until(
+        lambda: xmlrpc.client.ServerProxy(url).system.client_version(),
+        timeout=timeout,
+        interval=0.5,
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(session, config, items):
+    # Under `pytest -n auto --dist loadgroup`, keep every test that needs the
+    # container on one worker; they share its fixed name and ports
+    for item in items:
+        if 'docker_rtorrent' in item.fixturenames:
+            item.add_marker(pytest.mark.xdist_group("rtorrent"))
+
+
+def pytest_collection_finish(session):
+    # session.items is final here, after -k/-m deselection. Boot the container
+    # in the background only if a selected test needs it, so its startup
+    # overlaps with the tests that run first. xdist workers each collect
+    # every test, so there it is left to the fixture on whichever worker runs
+    # the group.
+    if session.config.option.collectonly or os.environ.get("PYTEST_XDIST_WORKER"):
+        return
+    if any('docker_rtorrent' in item.fixturenames for item in session.items):
+        _container_boot()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # The fixture stops the container on teardown, but a run that stops early
+    # (-x, Ctrl-C) may never reach or finish its tests
+    if _container_future is None or _container_future.cancel():
+        return
+    try:
+        container = _container_future.result()
+    except Exception:
+        return
+    container.stop()
+
+
+@pytest.fixture(scope="session")
+def docker_rtorrent():
+    container = _container_boot().result()
     yield container
     container.stop()
 
@@ -20,3 +136,45 @@ def rtorrent_client(docker_rtorrent):
         container_ip = "localhost"
     client = RTorrentClient(f"http://{container_ip}:9080/RPC2")
     yield client
+
+
+def _fast_hash_password(password):
+    return "sha256$" + hashlib.sha256(password.encode()).hexdigest()
+
+
+def _fast_verify_password(plain_password, hashed_password):
+    return hashed_password == _fast_hash_password(plain_password)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _fast_password_hash():
+    """
+    Swap bcrypt for a single SHA-256 in the auth module for the whole run.
+
+    Session-scoped so module-scoped login fixtures already see the stub.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("torrent_manager.auth.hash_password", _fast_hash_password)
+        mp.setattr("torrent_manager.auth.verify_password", _fast_verify_password)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _real_password_hash(request, monkeypatch):
+    """Put the real hasher back for tests marked real_password_hash."""
+    if request.node.get_closest_marker("real_password_hash"):
+        monkeypatch.setattr("torrent_manager.auth.hash_password", hash_password)
+        monkeypatch.setattr("torrent_manager.auth.verify_password", verify_password)
+
+
+@pytest.fixture(scope="session")
+def debian_torrent_binary():
+    """The Debian test torrent, read once and wrapped for XML-RPC uploads."""
+    with open(DEBIAN_TORRENT, "rb") as f:
+        return xmlrpc.client.Binary(f.read())
+
+
+@pytest.fixture(scope="session")
+def test_password_hash(_fast_password_hash):
+    """Stubbed hash of TEST_PASSWORD, matching the _fast_password_hash fixture."""
+    return _fast_hash_password(TEST_PASSWORD)
@@ -1,6 +1,5 @@
 import unittest
-import tempfile
-import os
+import sqlite3
 import datetime
 import time
 
@@ -10,24 +9,40 @@ from torrent_manager.dbs import sdb as db
 
 
 class TestActivity(unittest.TestCase):
+    DB_URI = 'file:activity_test?mode=memory&cache=shared'
+    # Durability is irrelevant for a throwaway test database; the journal stays
+    # in memory (rather than off) so per-test rollbacks still work
+    DB_PRAGMAS = {
+        'journal_mode': 'memory',
+        'synchronous': 0,
+        'locking_mode': 'exclusive',
+        'temp_store': 'memory',
+        'cache_size': -64000,
+    }
+
     @classmethod
     def setUpClass(cls):
-        cls.temp_db = tempfile.NamedTemporaryFile(delete=False)
-        cls.temp_db.close()
-        db.init(cls.temp_db.name)
+        # The shared-cache memory DB lives as long as one connection to it is
+        # open, so hold an anchor while Activity opens and closes its own
+        cls.anchor = sqlite3.connect(cls.DB_URI, uri=True)
+        db.init(cls.DB_URI, uri=True, pragmas=cls.DB_PRAGMAS)
         db.connect()
         db.create_tables([Status])
         db.close()
 
     @classmethod
     def tearDownClass(cls):
-        os.unlink(cls.temp_db.name)
+        cls.anchor.close()
 
     def setUp(self):
         self.activity = Activity()
-        Status.delete().execute()  # Clear the database before each test
+        # Each test runs in a transaction that tearDown rolls back
+        self._txn = db.transaction()
+        self._txn.__enter__()
 
     def tearDown(self):
+        self._txn.rollback()
+        self._txn.__exit__(None, None, None)
         self.activity.close()
 
     def test_record_torrent_status(self):
@@ -41,13 +56,29 @@ class TestActivity(unittest.TestCase):
         self.assertEqual(status.status, 'seeding')
         self.assertEqual(status.progress, 1.0)
 
+    def test_record_torrent_statuses(self):
+        self.activity.record_torrent_statuses([
+            {'info_hash': "hash_a"},
+            {'info_hash': "hash_b", 'is_seeding': False, 'is_private': True},
+        ])
+
+        statuses = {s.torrent_hash: s for s in Status.select()}
+
+        self.assertEqual(set(statuses), {"hash_a", "hash_b"})
+        self.assertEqual(statuses["hash_a"].status, 'seeding')
+        self.assertEqual(statuses["hash_b"].status, 'stopped')
+        self.assertTrue(statuses["hash_b"].is_private)
+
     def test_calculate_seeding_duration(self):
         info_hash = "test_hash"
         start_time = datetime.datetime.now() - datetime.timedelta(hours=2)
         
         # Record seeding at different times
-        for i in range(61):
-            self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=i))
+        one_minute = datetime.timedelta(minutes=1)
+        self.activity.record_torrent_statuses([
+            {'info_hash': info_hash, 'timestamp': start_time + i * one_minute}
+            for i in range(61)
+        ])
 
         duration = self.activity.calculate_seeding_duration(info_hash)
         
@@ -59,23 +90,26 @@ class TestActivity(unittest.TestCase):
         start_time = datetime.datetime.now() - datetime.timedelta(minutes=35)
 
         # Record seeding with gaps
-        self.activity.record_torrent_status(info_hash, timestamp=start_time)
-        self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=1))
-        self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=2))
-        # Gap
-        self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=32))
-        self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=33))
-        # Stop seeding to prevent counting time to now
-        self.activity.record_torrent_status(info_hash, is_seeding=False, timestamp=start_time + datetime.timedelta(minutes=34))
+        with db.atomic():
+            self.activity.record_torrent_status(info_hash, timestamp=start_time)
+            self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=1))
+            self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=2))
+            # Gap
+            self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=32))
+            self.activity.record_torrent_status(info_hash, timestamp=start_time + datetime.timedelta(minutes=33))
+            # Stop seeding to prevent counting time to now
+            self.activity.record_torrent_status(info_hash, is_seeding=False, timestamp=start_time + datetime.timedelta(minutes=34))
 
         duration = self.activity.calculate_seeding_duration(info_hash)
         expected_duration = 3 * 60  # 3 minutes * 60 seconds
         self.assertAlmostEqual(duration, expected_duration, delta=5)
 
     def test_get_never_seeded_torrents(self):
-        self.activity.record_torrent_status("seeded_hash", is_seeding=True)
-        self.activity.record_torrent_status("never_seeded_hash1", is_seeding=False)
-        self.activity.record_torrent_status("never_seeded_hash2", is_seeding=False)
+        self.activity.record_torrent_statuses([
+            {'info_hash': "seeded_hash", 'is_seeding': True},
+            {'info_hash': "never_seeded_hash1", 'is_seeding': False},
+            {'info_hash': "never_seeded_hash2", 'is_seeding': False},
+        ])
         
         never_seeded = self.activity.get_never_seeded_torrents()
         
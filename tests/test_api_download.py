@@ -2,69 +2,123 @@
 Tests for torrent file download URL generation and file listing.
 
 Verifies that download URLs are correctly constructed for both single-file
-and multi-file torrents, including proper path handling.
+and multi-file torrents, including proper path handling, and that proxied
+downloads stream the upstream body.
 """
 
 import os
 import pytest
 import pytest_asyncio
-from unittest.mock import patch, MagicMock
-from httpx import AsyncClient, ASGITransport
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport, Cookies
 from peewee import SqliteDatabase
 
 os.environ["COOKIE_SECURE"] = "false"
 
-from torrent_manager.api import app
-from torrent_manager.auth import UserManager
+from torrent_manager.auth import generate_secure_token
 from torrent_manager.models import User, Session, RememberMeToken, TorrentServer, db
 
+from .conftest import TEST_DB_PRAGMAS
 
-@pytest.fixture(autouse=True)
-def setup_test_db():
-    """Setup test database before each test."""
-    from torrent_manager import models as model_module
 
-    test_db = SqliteDatabase(':memory:')
+class _StubClient:
+    """Minimal torrent client returning canned torrents from list_torrents."""
+
+    def __init__(self, torrents):
+        self._torrents = torrents
+
+    def list_torrents(self, *args, **kwargs):
+        return iter(self._torrents)
+
+
+class _StubResponse:
+    """Streaming response stub that yields its body as a single chunk."""
+
+    def __init__(self, body, headers=None):
+        self._body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        return iter((self._body,))
+
+    def close(self):
+        pass
+
+
+class _StubHttpClient:
+    """HTTP download client stub that serves one canned response."""
+
+    timeout = 10
+
+    def __init__(self, response):
+        self._response = response
+
+    def _build_url(self, path, is_dir=False):
+        return f"http://localhost/downloads/{path}"
+
+    def _session_get(self, url, **kwargs):
+        return self._response
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_test_db():
+    """Setup test database once for the module."""
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
     models_list = [User, Session, RememberMeToken, TorrentServer]
-    test_db.bind(models_list, bind_refs=False, bind_backrefs=False)
 
-    old_db = model_module.db
-    model_module.db._state.closed = True
-    for model in models_list:
-        model._meta.database = test_db
+    old_db = db.obj
+    db.initialize(test_db)
 
     test_db.connect()
-    test_db.create_tables(models_list)
+    with test_db.atomic():
+        test_db.create_tables(models_list)
 
-    yield
+    yield test_db
 
-    test_db.drop_tables(models_list)
+    # Closing an in-memory database discards its tables
     test_db.close()
+    db.initialize(old_db)
+
+
+@pytest.fixture(autouse=True)
+def rollback_test_db(setup_test_db):
+    """Run each test in a transaction that is rolled back afterwards."""
+    with setup_test_db.atomic() as txn:
+        yield
+        txn.rollback()
 
-    for model in models_list:
-        model._meta.database = old_db
 
+@pytest.fixture(scope="session")
+def app():
+    """Import the FastAPI app on first use rather than at collection time."""
+    from torrent_manager.api import app as _app
+    return _app
 
-@pytest_asyncio.fixture
-async def async_client():
-    """Create async test client."""
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def async_client(app):
+    """Create one async test client for the module."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
-@pytest.fixture
-def test_user():
-    """Create a test user."""
-    return UserManager.create_user(
+@pytest.fixture(scope="module")
+def test_user(setup_test_db, test_password_hash):
+    """Create a test user shared by the module, outside the per-test rollback."""
+    return User.create(
+        id=generate_secure_token(16),
         username="testuser",
-        password="testpass123"
+        password=test_password_hash
     )
 
 
-@pytest_asyncio.fixture
-async def authenticated_client(async_client, test_user):
-    """Create an authenticated async client."""
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def _session_cookies(async_client, test_user):
+    """Log in once and return the session cookies for every test to reuse."""
     await async_client.post(
         "/auth/login",
         json={
@@ -73,224 +127,166 @@ async def authenticated_client(async_client, test_user):
             "remember_me": False
         }
     )
+    return Cookies(async_client.cookies)
+
+
+@pytest.fixture
+def authenticated_client(async_client, _session_cookies):
+    """Reset the shared client's cookies to the logged-in session."""
+    async_client.cookies.clear()
+    async_client.cookies.update(_session_cookies)
     return async_client
 
 
-@pytest_asyncio.fixture
+SERVER_CONFIGS = {
+    "http": {
+        "name": "Test Server",
+        "server_type": "rtorrent",
+        "host": "localhost",
+        "port": 9080,
+        "http_host": "localhost",
+        "http_port": 80,
+        "http_path": "/downloads"
+    },
+    "mount": {
+        "name": "Mount Server",
+        "server_type": "rtorrent",
+        "host": "localhost",
+        "port": 9080,
+        "mount_path": "/mnt/seedbox"
+    },
+    "none": {
+        "name": "No Download Server",
+        "server_type": "rtorrent",
+        "host": "localhost",
+        "port": 9080
+    },
+}
+
+
+@pytest_asyncio.fixture(loop_scope="module")
 async def server_with_http(authenticated_client):
     """Create a server with HTTP download configured."""
-    response = await authenticated_client.post(
-        "/servers",
-        json={
-            "name": "Test Server",
-            "server_type": "rtorrent",
-            "host": "localhost",
-            "port": 9080,
-            "http_host": "localhost",
-            "http_port": 80,
-            "http_path": "/downloads"
-        }
-    )
+    response = await authenticated_client.post("/servers", json=SERVER_CONFIGS["http"])
     return response.json()
 
 
-@pytest_asyncio.fixture
-async def server_with_mount(authenticated_client):
-    """Create a server with local mount configured."""
-    response = await authenticated_client.post(
-        "/servers",
-        json={
-            "name": "Mount Server",
-            "server_type": "rtorrent",
-            "host": "localhost",
-            "port": 9080,
-            "mount_path": "/mnt/seedbox"
-        }
-    )
-    return response.json()
+def _single_file_torrent(info_hash, name, size=1000):
+    return {
+        "info_hash": info_hash,
+        "name": name,
+        "path": f"/downloads/{name}",
+        "is_multi_file": False,
+        "files": [{"path": name, "size": size, "progress": 1.0, "priority": 1}]
+    }
 
 
 class TestDownloadUrlGeneration:
     """Tests for download URL generation in torrent file listings."""
 
-    @pytest.mark.asyncio
-    async def test_single_file_torrent_download_url(self, authenticated_client, server_with_http):
-        """Single-file torrents should have download URL with just the filename."""
-        server_id = server_with_http["id"]
-
-        mock_torrent = {
-            "info_hash": "ABC123",
-            "name": "movie.mkv",
-            "path": "/downloads/movie.mkv",
-            "is_multi_file": False,
-            "files": [
-                {"path": "movie.mkv", "size": 1000000, "progress": 1.0, "priority": 1}
-            ]
-        }
+    @pytest.mark.parametrize("server_kind,mock_torrent,expected_paths", [
+        # Single-file torrents have a download URL with just the filename
+        pytest.param(
+            "http", _single_file_torrent("ABC123", "movie.mkv", 1000000),
+            ["movie.mkv"],
+            id="single_file",
+        ),
+        # Multi-file torrents have a download URL with torrent_name/file_path
+        pytest.param(
+            "http",
+            {
+                "info_hash": "DEF456",
+                "name": "My Album",
+                "path": "/downloads/My Album",
+                "is_multi_file": True,
+                "files": [
+                    {"path": "track01.mp3", "size": 5000000, "progress": 1.0, "priority": 1},
+                    {"path": "track02.mp3", "size": 4500000, "progress": 1.0, "priority": 1},
+                    {"path": "covers/front.jpg", "size": 100000, "progress": 1.0, "priority": 1}
+                ]
+            },
+            ["My Album/track01.mp3", "My Album/track02.mp3", "My Album/covers/front.jpg"],
+            id="multi_file",
+        ),
+        # http_enabled is true when http_port is configured
+        pytest.param(
+            "http", _single_file_torrent("GHI789", "file.zip"),
+            ["file.zip"],
+            id="http_port",
+        ),
+        # http_enabled is true when mount_path is configured (even without http_port)
+        pytest.param(
+            "mount", _single_file_torrent("JKL012", "file.zip"),
+            ["file.zip"],
+            id="mount_path",
+        ),
+        # No download_url when neither http_port nor mount_path is configured
+        pytest.param(
+            "none", _single_file_torrent("MNO345", "file.zip"),
+            None,
+            id="no_http_or_mount",
+        ),
+        # Torrent names with special characters are handled correctly
+        pytest.param(
+            "http",
+            {
+                "info_hash": "PQR678",
+                "name": "The Guest Room [B0FXBRPYH7]",
+                "path": "/downloads/The Guest Room [B0FXBRPYH7]",
+                "is_multi_file": True,
+                "files": [
+                    {"path": "The Guest Room [B0FXBRPYH7].m4b", "size": 500000000, "progress": 1.0, "priority": 1}
+                ]
+            },
+            ["The Guest Room [B0FXBRPYH7]/The Guest Room [B0FXBRPYH7].m4b"],
+            id="special_characters",
+        ),
+    ])
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_file_listing_download_urls(self, authenticated_client, server_kind, mock_torrent, expected_paths):
+        """File listings carry download URLs only when HTTP or a mount is configured."""
+        response = await authenticated_client.post("/servers", json=SERVER_CONFIGS[server_kind])
+        server_id = response.json()["id"]
+        info_hash = mock_torrent["info_hash"]
 
         with patch("torrent_manager.api.routes.torrents.get_client") as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.list_torrents.return_value = iter([mock_torrent])
-            mock_get_client.return_value = mock_client
+            mock_get_client.return_value = _StubClient([mock_torrent])
 
             response = await authenticated_client.get(
-                f"/torrents/ABC123/files?server_id={server_id}"
+                f"/torrents/{info_hash}/files?server_id={server_id}"
             )
 
         assert response.status_code == 200
         data = response.json()
-        assert len(data["files"]) == 1
-        assert data["files"][0]["download_url"] == f"/servers/{server_id}/download/movie.mkv"
-
-    @pytest.mark.asyncio
-    async def test_multi_file_torrent_download_url(self, authenticated_client, server_with_http):
-        """Multi-file torrents should have download URL with torrent_name/file_path."""
-        server_id = server_with_http["id"]
-
-        mock_torrent = {
-            "info_hash": "DEF456",
-            "name": "My Album",
-            "path": "/downloads/My Album",
-            "is_multi_file": True,
-            "files": [
-                {"path": "track01.mp3", "size": 5000000, "progress": 1.0, "priority": 1},
-                {"path": "track02.mp3", "size": 4500000, "progress": 1.0, "priority": 1},
-                {"path": "covers/front.jpg", "size": 100000, "progress": 1.0, "priority": 1}
+        assert len(data["files"]) == len(mock_torrent["files"])
+
+        if expected_paths is None:
+            assert data["http_enabled"] is False
+            assert all("download_url" not in f for f in data["files"])
+        else:
+            assert data["http_enabled"] is True
+            assert [f["download_url"] for f in data["files"]] == [
+                f"/servers/{server_id}/download/{path}" for path in expected_paths
             ]
-        }
 
-        with patch("torrent_manager.api.routes.torrents.get_client") as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.list_torrents.return_value = iter([mock_torrent])
-            mock_get_client.return_value = mock_client
 
-            response = await authenticated_client.get(
-                f"/torrents/DEF456/files?server_id={server_id}"
-            )
+class TestFileDownload:
+    """Tests for proxied file downloads."""
 
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data["files"]) == 3
-        assert data["files"][0]["download_url"] == f"/servers/{server_id}/download/My Album/track01.mp3"
-        assert data["files"][1]["download_url"] == f"/servers/{server_id}/download/My Album/track02.mp3"
-        assert data["files"][2]["download_url"] == f"/servers/{server_id}/download/My Album/covers/front.jpg"
-
-    @pytest.mark.asyncio
-    async def test_http_enabled_with_http_port(self, authenticated_client, server_with_http):
-        """http_enabled should be true when http_port is configured."""
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_download_file_success(self, authenticated_client, server_with_http):
+        """Files without a local mount should be streamed from the HTTP server."""
         server_id = server_with_http["id"]
+        stub = _StubHttpClient(_StubResponse(
+            b"hello world",
+            {"Content-Type": "text/plain", "Content-Length": "11"}
+        ))
 
-        mock_torrent = {
-            "info_hash": "GHI789",
-            "name": "file.zip",
-            "path": "/downloads/file.zip",
-            "is_multi_file": False,
-            "files": [{"path": "file.zip", "size": 1000, "progress": 1.0, "priority": 1}]
-        }
-
-        with patch("torrent_manager.api.routes.torrents.get_client") as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.list_torrents.return_value = iter([mock_torrent])
-            mock_get_client.return_value = mock_client
-
-            response = await authenticated_client.get(
-                f"/torrents/GHI789/files?server_id={server_id}"
-            )
-
-        assert response.status_code == 200
-        data = response.json()
-        assert data["http_enabled"] is True
-        assert "download_url" in data["files"][0]
-
-    @pytest.mark.asyncio
-    async def test_http_enabled_with_mount_path(self, authenticated_client, server_with_mount):
-        """http_enabled should be true when mount_path is configured (even without http_port)."""
-        server_id = server_with_mount["id"]
-
-        mock_torrent = {
-            "info_hash": "JKL012",
-            "name": "file.zip",
-            "path": "/downloads/file.zip",
-            "is_multi_file": False,
-            "files": [{"path": "file.zip", "size": 1000, "progress": 1.0, "priority": 1}]
-        }
-
-        with patch("torrent_manager.api.routes.torrents.get_client") as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.list_torrents.return_value = iter([mock_torrent])
-            mock_get_client.return_value = mock_client
-
+        with patch("torrent_manager.api.routes.servers.get_http_client", return_value=stub):
             response = await authenticated_client.get(
-                f"/torrents/JKL012/files?server_id={server_id}"
+                f"/servers/{server_id}/download/movie.mkv"
             )
 
         assert response.status_code == 200
-        data = response.json()
-        assert data["http_enabled"] is True
-        assert "download_url" in data["files"][0]
-
-    @pytest.mark.asyncio
-    async def test_no_download_url_without_http_or_mount(self, authenticated_client):
-        """No download_url when neither http_port nor mount_path configured."""
-        # Create server without HTTP or mount
-        response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "No Download Server",
-                "server_type": "rtorrent",
-                "host": "localhost",
-                "port": 9080
-            }
-        )
-        server_id = response.json()["id"]
-
-        mock_torrent = {
-            "info_hash": "MNO345",
-            "name": "file.zip",
-            "path": "/downloads/file.zip",
-            "is_multi_file": False,
-            "files": [{"path": "file.zip", "size": 1000, "progress": 1.0, "priority": 1}]
-        }
-
-        with patch("torrent_manager.api.routes.torrents.get_client") as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.list_torrents.return_value = iter([mock_torrent])
-            mock_get_client.return_value = mock_client
-
-            response = await authenticated_client.get(
-                f"/torrents/MNO345/files?server_id={server_id}"
-            )
-
-        assert response.status_code == 200
-        data = response.json()
-        assert data["http_enabled"] is False
-        assert "download_url" not in data["files"][0]
-
-    @pytest.mark.asyncio
-    async def test_special_characters_in_torrent_name(self, authenticated_client, server_with_http):
-        """Torrent names with special characters should be handled correctly."""
-        server_id = server_with_http["id"]
-
-        mock_torrent = {
-            "info_hash": "PQR678",
-            "name": "The Guest Room [B0FXBRPYH7]",
-            "path": "/downloads/The Guest Room [B0FXBRPYH7]",
-            "is_multi_file": True,
-            "files": [
-                {"path": "The Guest Room [B0FXBRPYH7].m4b", "size": 500000000, "progress": 1.0, "priority": 1}
-            ]
-        }
-
-        with patch("torrent_manager.api.routes.torrents.get_client") as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.list_torrents.return_value = iter([mock_torrent])
-            mock_get_client.return_value = mock_client
-
-            response = await authenticated_client.get(
-                f"/torrents/PQR678/files?server_id={server_id}"
-            )
-
-        assert response.status_code == 200
-        data = response.json()
-        expected_url = f"/servers/{server_id}/download/The Guest Room [B0FXBRPYH7]/The Guest Room [B0FXBRPYH7].m4b"
-        assert data["files"][0]["download_url"] == expected_url
+        assert response.content == b"hello world"
+        assert response.headers["content-type"].startswith("text/plain")
@@ -4,6 +4,7 @@ Tests for API key authentication system.
 Tests cover API key generation, validation, revocation, and authentication.
 """
 
+import dataclasses
 import datetime
 import os
 import pytest
@@ -15,52 +16,65 @@ from peewee import SqliteDatabase
 os.environ["COOKIE_SECURE"] = "false"
 
 from torrent_manager.api import app
-from torrent_manager.auth import ApiKeyManager, UserManager
+from torrent_manager.auth import ApiKeyManager, generate_secure_token, hash_api_key
 from torrent_manager.models import User, Session, RememberMeToken, ApiKey
 
+from .conftest import TEST_DB_PRAGMAS
+
 
 # Use in-memory database for tests
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="module", autouse=True)
 def setup_test_db():
-    """Setup test database before each test."""
+    """Setup test database once for the module."""
     from torrent_manager import models as model_module
 
-    test_db = SqliteDatabase(':memory:')
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
 
     models_list = [User, Session, RememberMeToken, ApiKey]
-    test_db.bind(models_list, bind_refs=False, bind_backrefs=False)
-
-    old_db = model_module.db
-    model_module.db._state.closed = True
-    for model in models_list:
-        model._meta.database = test_db
+    old_db = model_module.db.obj
+    model_module.db.initialize(test_db)
 
     test_db.connect()
-    test_db.create_tables(models_list)
+    with test_db.atomic():
+        test_db.create_tables(models_list)
 
-    yield
+    yield test_db
 
-    test_db.drop_tables(models_list)
+    # Closing an in-memory database discards its tables
     test_db.close()
+    model_module.db.initialize(old_db)
 
-    for model in models_list:
-        model._meta.database = old_db
+
+@pytest.fixture(autouse=True)
+def rollback_test_db(setup_test_db):
+    """Run each test in a transaction that is rolled back afterwards."""
+    with setup_test_db.atomic() as txn:
+        yield
+        txn.rollback()
 
 
-@pytest_asyncio.fixture
-async def async_client():
-    """Create async test client."""
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def _shared_client():
+    """Create one async test client for the module."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
 @pytest.fixture
-def test_user():
-    """Create a test user."""
-    return UserManager.create_user(
+def async_client(_shared_client):
+    """Hand each test the shared client without cookies from earlier tests."""
+    _shared_client.cookies.clear()
+    return _shared_client
+
+
+@pytest.fixture
+def test_user(test_password_hash):
+    """Create a test user, reusing the session's precomputed password hash."""
+    return User.create(
+        id=generate_secure_token(16),
         username="testuser",
-        password="testpass123"
+        password=test_password_hash
     )
 
 
@@ -78,7 +92,9 @@ class TestApiKeyManagement:
         assert len(api_key) > 20  # Should be a secure random token
 
         # Verify key in database
-        key = ApiKey.get(ApiKey.api_key == api_key)
+        key = ApiKey.get(ApiKey.key_hash == hash_api_key(api_key))
+        assert key.key_hash != api_key  # Only the hash is stored
+        assert key.prefix == api_key[:8]
         assert key.user_id == test_user.id
         assert key.name == "Test Key"
         assert key.revoked is False
@@ -93,7 +109,7 @@ class TestApiKeyManagement:
             expires_at=expires_at
         )
 
-        key = ApiKey.get(ApiKey.api_key == api_key)
+        key = ApiKey.get(ApiKey.key_hash == hash_api_key(api_key))
         assert key.expires_at is not None
 
     def test_validate_api_key_success(self, test_user):
@@ -106,9 +122,26 @@ class TestApiKeyManagement:
         key = ApiKeyManager.validate_api_key(api_key)
         assert key is not None
         assert key.user_id == test_user.id
+        assert key.prefix == api_key[:8]
 
-        # Check that last_used_at was updated
-        assert key.last_used_at is not None
+        # Cache hits share this object, so it must not be writable
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            key.user_id = "someone-else"
+
+    def test_validate_api_key_usage_written_on_flush(self, test_user):
+        """Test that last_used_at reaches the database only when usage is flushed."""
+        api_key = ApiKeyManager.create_api_key(
+            user_id=test_user.id,
+            name="Used Key"
+        )
+        key_hash = hash_api_key(api_key)
+
+        ApiKeyManager.validate_api_key(api_key)
+        assert ApiKey.get(ApiKey.key_hash == key_hash).last_used_at is None
+
+        assert ApiKeyManager.flush_usage() == 1
+        assert isinstance(ApiKey.get(ApiKey.key_hash == key_hash).last_used_at, datetime.datetime)
+        assert ApiKeyManager.flush_usage() == 0
 
     def test_validate_api_key_expired(self, test_user):
         """Test validating an expired API key."""
@@ -118,7 +151,7 @@ class TestApiKeyManagement:
         )
 
         # Manually expire the key
-        key = ApiKey.get(ApiKey.api_key == api_key)
+        key = ApiKey.get(ApiKey.key_hash == hash_api_key(api_key))
         key.expires_at = datetime.datetime.now() - datetime.timedelta(days=1)
         key.save()
 
@@ -140,6 +173,20 @@ class TestApiKeyManagement:
         result = ApiKeyManager.validate_api_key(api_key)
         assert result is None
 
+    def test_validate_api_key_cached_until_revoked(self, test_user):
+        """Test that cached validations are dropped when the key is revoked."""
+        api_key = ApiKeyManager.create_api_key(
+            user_id=test_user.id,
+            name="Cached Key"
+        )
+
+        first = ApiKeyManager.validate_api_key(api_key)
+        second = ApiKeyManager.validate_api_key(api_key)
+        assert second is first  # Served from the cache
+
+        ApiKeyManager.revoke_api_key(api_key)
+        assert ApiKeyManager.validate_api_key(api_key) is None
+
     def test_validate_api_key_nonexistent(self):
         """Test validating a non-existent API key."""
         result = ApiKeyManager.validate_api_key("nonexistent_key")
@@ -157,19 +204,32 @@ class TestApiKeyManagement:
         assert result is True
 
         # Verify it's revoked
-        key = ApiKey.get(ApiKey.api_key == api_key)
+        key = ApiKey.get(ApiKey.key_hash == hash_api_key(api_key))
         assert key.revoked is True
 
     def test_list_user_api_keys(self, test_user):
         """Test listing user's API keys."""
         # Create multiple keys
-        ApiKeyManager.create_api_key(user_id=test_user.id, name="Key 1")
-        ApiKeyManager.create_api_key(user_id=test_user.id, name="Key 2")
-        ApiKeyManager.create_api_key(user_id=test_user.id, name="Key 3")
+        ApiKeyManager.bulk_create_api_keys(test_user.id, ["Key 1", "Key 2", "Key 3"])
 
         keys = ApiKeyManager.list_user_api_keys(test_user.id)
         assert len(keys) == 3
 
+    def test_find_user_api_key(self, test_user):
+        """Test finding a user's active API key by prefix."""
+        api_key = ApiKeyManager.create_api_key(
+            user_id=test_user.id,
+            name="Findable Key"
+        )
+
+        key = ApiKeyManager.find_user_api_key(test_user.id, api_key[:8])
+        assert key is not None
+        assert key.name == "Findable Key"
+        assert ApiKeyManager.find_user_api_key("other-user", api_key[:8]) is None
+
+        ApiKeyManager.revoke_api_key(api_key)
+        assert ApiKeyManager.find_user_api_key(test_user.id, api_key[:8]) is None
+
     def test_delete_api_key(self, test_user):
         """Test permanently deleting an API key."""
         api_key = ApiKeyManager.create_api_key(
@@ -182,49 +242,40 @@ class TestApiKeyManagement:
         assert result is True
 
         # Verify it's gone
-        try:
-            ApiKey.get(ApiKey.api_key == api_key)
-            assert False, "Key should have been deleted"
-        except ApiKey.DoesNotExist:
-            pass
+        assert not ApiKey.select().where(ApiKey.key_hash == hash_api_key(api_key)).exists()
 
     def test_cleanup_expired_keys(self, test_user):
         """Test cleanup of expired API keys."""
-        # Create expired key
-        api_key1 = ApiKeyManager.create_api_key(
-            user_id=test_user.id,
-            name="Expired Key"
-        )
-        key1 = ApiKey.get(ApiKey.api_key == api_key1)
-        key1.expires_at = datetime.datetime.now() - datetime.timedelta(days=1)
-        key1.save()
+        # Arrange both keys in one transaction
+        with ApiKey._meta.database.atomic():
+            # Create expired key
+            api_key1 = ApiKeyManager.create_api_key(
+                user_id=test_user.id,
+                name="Expired Key",
+                expires_at=datetime.datetime.now() - datetime.timedelta(days=1)
+            )
 
-        # Create valid key
-        api_key2 = ApiKeyManager.create_api_key(
-            user_id=test_user.id,
-            name="Valid Key"
-        )
+            # Create valid key
+            api_key2 = ApiKeyManager.create_api_key(
+                user_id=test_user.id,
+                name="Valid Key"
+            )
 
         # Cleanup
         ApiKeyManager.cleanup_expired_keys()
 
         # Expired key should be gone
-        try:
-            ApiKey.get(ApiKey.api_key == api_key1)
-            assert False, "Expired key should have been deleted"
-        except ApiKey.DoesNotExist:
-            pass
+        assert not ApiKey.select().where(ApiKey.key_hash == hash_api_key(api_key1)).exists()
 
         # Valid key should still exist
-        key2 = ApiKey.get(ApiKey.api_key == api_key2)
-        assert key2 is not None
+        assert ApiKey.select().where(ApiKey.key_hash == hash_api_key(api_key2)).exists()
 
     def test_list_user_api_keys_excludes_revoked(self, test_user):
         """Test that revoked keys are excluded from the list by default."""
         # Create multiple keys
-        key1 = ApiKeyManager.create_api_key(user_id=test_user.id, name="Key 1")
-        key2 = ApiKeyManager.create_api_key(user_id=test_user.id, name="Key 2")
-        key3 = ApiKeyManager.create_api_key(user_id=test_user.id, name="Key 3")
+        key1, key2, key3 = ApiKeyManager.bulk_create_api_keys(
+            test_user.id, ["Key 1", "Key 2", "Key 3"]
+        )
 
         # List should show all 3 keys
         keys = ApiKeyManager.list_user_api_keys(test_user.id)
@@ -246,10 +297,50 @@ class TestApiKeyManagement:
         assert len(keys_with_revoked) == 3
 
 
+    def test_init_db_migrates_plaintext_keys(self, tmp_path):
+        """Test that keys stored in plaintext by older schemas are hashed on startup."""
+        from torrent_manager.models import db, init_db
+
+        legacy_db = SqliteDatabase(str(tmp_path / "legacy.db"))
+        legacy_db.execute_sql(
+            'CREATE TABLE "apikey" ("api_key" VARCHAR(64) NOT NULL PRIMARY KEY, '
+            '"user_id" VARCHAR(255) NOT NULL, "name" VARCHAR(255) NOT NULL, '
+            '"created_at" DATETIME NOT NULL, "last_used_at" DATETIME, '
+            '"expires_at" DATETIME, "revoked" INTEGER NOT NULL)'
+        )
+        legacy_db.execute_sql(
+            'INSERT INTO "apikey" VALUES (?, ?, ?, ?, NULL, NULL, 0)',
+            ("legacy-plaintext-key", "user1", "Old Key", "2024-01-01 00:00:00")
+        )
+
+        old_db = db.obj
+        db.initialize(legacy_db)
+        try:
+            init_db(legacy_db)
+            key = ApiKey.get(ApiKey.key_hash == hash_api_key("legacy-plaintext-key"))
+            assert key.prefix == "legacy-p"
+            assert key.name == "Old Key"
+        finally:
+            legacy_db.close()
+            db.initialize(old_db)
+
+
 class TestApiKeyAuthentication:
     """Tests for API key-based authentication."""
 
-    @pytest.mark.asyncio
+    def test_extract_bearer(self):
+        """Test parsing of the Authorization header."""
+        from torrent_manager.api.dependencies import extract_bearer
+
+        assert extract_bearer("Bearer abc123") == "abc123"
+        assert extract_bearer("bearer abc123") == "abc123"
+        assert extract_bearer("Bearer  abc123 ") == "abc123"
+        assert extract_bearer("Bearer ") is None
+        assert extract_bearer("Basic abc123") is None
+        assert extract_bearer("abc123") is None
+        assert extract_bearer(None) is None
+
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_authenticate_with_api_key(self, async_client, test_user):
         """Test authenticating with an API key."""
         # Create API key
@@ -269,7 +360,7 @@ class TestApiKeyAuthentication:
         assert data["username"] == "testuser"
         assert data["auth_method"] == "api_key"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_authenticate_with_invalid_api_key(self, async_client):
         """Test authentication with invalid API key."""
         response = await async_client.get(
@@ -279,7 +370,7 @@ class TestApiKeyAuthentication:
 
         assert response.status_code == 401
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_authenticate_without_bearer_prefix(self, async_client, test_user):
         """Test authentication with malformed Authorization header."""
         api_key = ApiKeyManager.create_api_key(
@@ -294,7 +385,7 @@ class TestApiKeyAuthentication:
 
         assert response.status_code == 401
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_access_protected_endpoint_with_api_key(self, async_client, test_user):
         """Test accessing protected endpoint with API key."""
         api_key = ApiKeyManager.create_api_key(
@@ -317,7 +408,7 @@ class TestApiKeyAuthentication:
 class TestApiKeyEndpoints:
     """Tests for API key management endpoints."""
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_create_api_key_endpoint(self, async_client, test_user):
         """Test creating API key via endpoint."""
         # First login to get session
@@ -339,7 +430,7 @@ class TestApiKeyEndpoints:
         assert data["name"] == "My API Key"
         assert "warning" in data
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_create_api_key_with_expiration(self, async_client, test_user):
         """Test creating API key with expiration."""
         await async_client.post("/auth/login", json={
@@ -357,7 +448,7 @@ class TestApiKeyEndpoints:
         data = response.json()
         assert data["expires_at"] is not None
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_list_api_keys_endpoint(self, async_client, test_user):
         """Test listing API keys via endpoint."""
         await async_client.post("/auth/login", json={
@@ -379,43 +470,40 @@ class TestApiKeyEndpoints:
         assert "prefix" in data[0]
         assert "name" in data[0]
 
-    @pytest.mark.asyncio
-    async def test_revoke_api_key_endpoint(self, test_user):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_revoke_api_key_endpoint(self, async_client, test_user):
         """Test revoking API key via endpoint."""
-        # Use separate client instances to avoid cookie interference
-        transport = ASGITransport(app=app)
-        async with AsyncClient(transport=transport, base_url="http://test") as client1:
-            await client1.post("/auth/login", json={
-                "username": "testuser",
-                "password": "testpass123",
-                "remember_me": False
-            })
-
-            # Create key
-            create_response = await client1.post(
-                "/auth/api-keys",
-                json={"name": "To Revoke"}
-            )
-            api_key = create_response.json()["api_key"]
-            key_prefix = api_key[:8]
-
-            # Revoke key
-            revoke_response = await client1.delete(f"/auth/api-keys/{key_prefix}")
-
-            assert revoke_response.status_code == 200
-            assert revoke_response.json()["message"] == "API key revoked successfully"
-
-        # Use a fresh client without session cookies to test API key
-        transport2 = ASGITransport(app=app)
-        async with AsyncClient(transport=transport2, base_url="http://test") as client2:
-            # Verify key is revoked by trying to use it
-            test_response = await client2.get(
-                "/auth/me",
-                headers={"Authorization": f"Bearer {api_key}"}
-            )
-            assert test_response.status_code == 401
+        await async_client.post("/auth/login", json={
+            "username": "testuser",
+            "password": "testpass123",
+            "remember_me": False
+        })
+
+        # Create key
+        create_response = await async_client.post(
+            "/auth/api-keys",
+            json={"name": "To Revoke"}
+        )
+        api_key = create_response.json()["api_key"]
+        key_prefix = api_key[:8]
+
+        # Revoke key
+        revoke_response = await async_client.delete(f"/auth/api-keys/{key_prefix}")
+
+        assert revoke_response.status_code == 200
+        assert revoke_response.json()["message"] == "API key revoked successfully"
+
+        # Drop the session cookies so only the API key authenticates
+        async_client.cookies.clear()
+
+        # Verify key is revoked by trying to use it
+        test_response = await async_client.get(
+            "/auth/me",
+            headers={"Authorization": f"Bearer {api_key}"}
+        )
+        assert test_response.status_code == 401
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_create_api_key_requires_auth(self, async_client):
         """Test that creating API key requires authentication."""
         response = await async_client.post(
@@ -425,7 +513,7 @@ class TestApiKeyEndpoints:
 
         assert response.status_code == 401
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_list_api_keys_requires_auth(self, async_client):
         """Test that listing API keys requires authentication."""
         response = await async_client.get("/auth/api-keys")
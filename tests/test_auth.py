@@ -6,7 +6,6 @@ and remember-me functionality.
 import datetime
 import os
 import tempfile
-import time
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -16,59 +15,77 @@ from peewee import SqliteDatabase
 os.environ["COOKIE_SECURE"] = "false"
 
 from torrent_manager.api import app, SESSION_COOKIE_NAME, REMEMBER_ME_COOKIE_NAME
-from torrent_manager.auth import SessionManager, UserManager, hash_password
-from torrent_manager.models import User, Session, RememberMeToken, db
+from torrent_manager import auth
+from torrent_manager.auth import SessionManager, UserManager, generate_secure_token, hash_session_token
+from torrent_manager.models import User, Session, RememberMeToken, bulk_insert, db
+
+from .conftest import TEST_DB_PRAGMAS
 
 
 # Use in-memory database for tests
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="module", autouse=True)
 def setup_test_db():
-    """Setup test database before each test."""
-    # Import here to avoid circular imports
-    from torrent_manager import models as model_module
-
-    # Use in-memory SQLite for tests
-    test_db = SqliteDatabase(':memory:')
-
-    # Bind models to test database
+    """Setup test database once for the module."""
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
     models_list = [User, Session, RememberMeToken]
-    test_db.bind(models_list, bind_refs=False, bind_backrefs=False)
 
-    # Also update the module-level db reference so the API uses test database
-    old_db = model_module.db
-    model_module.db._state.closed = True
-    for model in models_list:
-        model._meta.database = test_db
+    old_db = db.obj
+    db.initialize(test_db)
 
-    # Create tables
     test_db.connect()
-    test_db.create_tables(models_list)
+    with test_db.atomic():
+        test_db.create_tables(models_list)
 
-    yield
+    yield test_db
 
-    # Cleanup
-    test_db.drop_tables(models_list)
+    # Closing an in-memory database discards its tables
     test_db.close()
+    db.initialize(old_db)
 
-    # Restore original db
-    for model in models_list:
-        model._meta.database = old_db
 
+@pytest.fixture(autouse=True)
+def rollback_test_db(setup_test_db):
+    """Run each test in a transaction that is rolled back afterwards."""
+    with setup_test_db.atomic() as txn:
+        yield
+        txn.rollback()
 
-@pytest_asyncio.fixture
-async def async_client():
-    """Create async test client."""
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def _shared_client():
+    """Create one async test client for the module."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
 @pytest.fixture
-def test_user():
-    """Create a test user."""
-    return UserManager.create_user(
+def async_client(_shared_client):
+    """Hand each test the shared client without cookies from earlier tests."""
+    _shared_client.cookies.clear()
+    return _shared_client
+
+
+@pytest.fixture
+def advance_clock(monkeypatch):
+    """Return a function that moves the auth module's clock forward."""
+    now = auth._now()
+
+    def advance(delta: datetime.timedelta):
+        nonlocal now
+        now += delta
+        monkeypatch.setattr(auth, "_now", lambda: now)
+
+    return advance
+
+
+@pytest.fixture
+def test_user(test_password_hash):
+    """Create a test user, reusing the session's precomputed password hash."""
+    return User.create(
+        id=generate_secure_token(16),
         username="testuser",
-        password="testpass123"
+        password=test_password_hash
     )
 
 
@@ -86,6 +103,15 @@ class TestUserManagement:
         assert user.password != "password123"  # Password should be hashed
         assert user.id is not None
 
+    @pytest.mark.real_password_hash
+    def test_real_bcrypt_roundtrip(self):
+        """Test that the real hasher produces bcrypt hashes that verify."""
+        hashed = auth.hash_password("password123")
+
+        assert hashed.startswith("$2")
+        assert auth.verify_password("password123", hashed)
+        assert not auth.verify_password("wrongpassword", hashed)
+
     def test_authenticate_user_success(self, test_user):
         """Test successful user authentication."""
         user = UserManager.authenticate_user("testuser", "testpass123")
@@ -104,6 +130,16 @@ class TestUserManagement:
         user = UserManager.authenticate_user("nonexistent", "password")
         assert user is None
 
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_authenticate_user_async(self, test_user):
+        """Test that the async variant accepts and rejects like the sync one."""
+        user = await UserManager.authenticate_user_async("testuser", "testpass123")
+        assert user is not None
+        assert user.id == test_user.id
+
+        assert await UserManager.authenticate_user_async("testuser", "wrongpassword") is None
+        assert await UserManager.authenticate_user_async("nonexistent", "password") is None
+
 
 class TestSessionManagement:
     """Tests for session creation, validation, and management."""
@@ -119,8 +155,9 @@ class TestSessionManagement:
         assert session_id is not None
         assert len(session_id) > 20  # Should be a secure random token
 
-        # Verify session in database
-        session = Session.get(Session.session_id == session_id)
+        # Verify session in database; only its hash is stored
+        session = Session.get(Session.session_hash == hash_session_token(session_id))
+        assert session.session_hash != session_id
         assert session.user_id == test_user.id
         assert session.ip_address == "127.0.0.1"
         assert session.user_agent == "Test Agent"
@@ -133,14 +170,12 @@ class TestSessionManagement:
         assert session is not None
         assert session.user_id == test_user.id
 
-    def test_validate_session_expired(self, test_user):
+    def test_validate_session_expired(self, test_user, advance_clock):
         """Test validating an expired session."""
         session_id = SessionManager.create_session(user_id=test_user.id)
 
-        # Manually expire the session
-        session = Session.get(Session.session_id == session_id)
-        session.expires_at = datetime.datetime.now() - datetime.timedelta(days=1)
-        session.save()
+        # Move past the session's maximum age
+        advance_clock(datetime.timedelta(days=auth.SESSION_MAX_AGE_DAYS + 1))
 
         # Validate should return None for expired session
         result = SessionManager.validate_session(session_id)
@@ -163,6 +198,43 @@ class TestSessionManagement:
         session = SessionManager.validate_session(session_id)
         assert session is None
 
+    def test_init_db_migrates_plaintext_session_ids(self, tmp_path):
+        """Test that ids stored in plaintext by older schemas are hashed on startup."""
+        from torrent_manager.models import init_db
+
+        legacy_db = SqliteDatabase(str(tmp_path / "legacy.db"))
+        legacy_db.execute_sql(
+            'CREATE TABLE "session" ("session_id" VARCHAR(64) NOT NULL PRIMARY KEY, '
+            '"user_id" VARCHAR(255) NOT NULL, "created_at" DATETIME NOT NULL, '
+            '"last_activity" DATETIME NOT NULL, "expires_at" DATETIME NOT NULL, '
+            '"ip_address" VARCHAR(255), "user_agent" VARCHAR(255))'
+        )
+        legacy_db.execute_sql(
+            'CREATE TABLE "remembermetoken" ("token_id" VARCHAR(64) NOT NULL PRIMARY KEY, '
+            '"user_id" VARCHAR(255) NOT NULL, "created_at" DATETIME NOT NULL, '
+            '"expires_at" DATETIME NOT NULL, "ip_address" VARCHAR(255), '
+            '"user_agent" VARCHAR(255), "revoked" INTEGER NOT NULL)'
+        )
+        legacy_db.execute_sql(
+            'INSERT INTO "session" VALUES (?, ?, ?, ?, ?, NULL, NULL)',
+            ("legacy-session", "user1", "2024-01-01 00:00:00",
+             "2024-01-01 00:00:00", "2999-01-01 00:00:00")
+        )
+        legacy_db.execute_sql(
+            'INSERT INTO "remembermetoken" VALUES (?, ?, ?, ?, NULL, NULL, 0)',
+            ("legacy-token", "user1", "2024-01-01 00:00:00", "2999-01-01 00:00:00")
+        )
+
+        old_db = db.obj
+        db.initialize(legacy_db)
+        try:
+            init_db(legacy_db)
+            assert SessionManager.validate_session("legacy-session").user_id == "user1"
+            assert SessionManager.validate_remember_me_token("legacy-token").user_id == "user1"
+        finally:
+            legacy_db.close()
+            db.initialize(old_db)
+
 
 class TestSlidingExpiration:
     """Tests for session renewal with sliding expiration."""
@@ -175,19 +247,17 @@ class TestSlidingExpiration:
         # Session just created, should be within window
         assert SessionManager.should_renew_session(session) is True
 
-    def test_should_not_renew_session_outside_window(self, test_user):
+    def test_should_not_renew_session_outside_window(self, test_user, advance_clock):
         """Test that session should NOT be renewed when outside sliding window."""
         session_id = SessionManager.create_session(user_id=test_user.id)
 
-        # Manually set last activity to 8 days ago (outside 7-day window)
-        session = Session.get(Session.session_id == session_id)
-        session.last_activity = datetime.datetime.now() - datetime.timedelta(days=8)
-        session.save()
+        # Move 8 days past the last activity (outside 7-day window)
+        advance_clock(datetime.timedelta(days=8))
 
         session = SessionManager.validate_session(session_id)
         assert SessionManager.should_renew_session(session) is False
 
-    def test_renew_session_success(self, test_user):
+    def test_renew_session_success(self, test_user, advance_clock):
         """Test successful session renewal."""
         session_id = SessionManager.create_session(user_id=test_user.id)
 
@@ -196,8 +266,8 @@ class TestSlidingExpiration:
         original_expires_at = session.expires_at
         original_last_activity = session.last_activity
 
-        # Wait a moment to ensure timestamps differ
-        time.sleep(0.1)
+        # Move the clock so timestamps differ
+        advance_clock(datetime.timedelta(seconds=1))
 
         # Renew session
         renewed, new_expires_at = SessionManager.renew_session(session_id)
@@ -210,14 +280,12 @@ class TestSlidingExpiration:
         assert session.expires_at > original_expires_at
         assert session.last_activity > original_last_activity
 
-    def test_renew_session_outside_window(self, test_user):
+    def test_renew_session_outside_window(self, test_user, advance_clock):
         """Test that session renewal fails when outside sliding window."""
         session_id = SessionManager.create_session(user_id=test_user.id)
 
-        # Set last activity outside window
-        session = Session.get(Session.session_id == session_id)
-        session.last_activity = datetime.datetime.now() - datetime.timedelta(days=8)
-        session.save()
+        # Move past the sliding window
+        advance_clock(datetime.timedelta(days=8))
 
         # Try to renew
         renewed, new_expires_at = SessionManager.renew_session(session_id)
@@ -240,8 +308,9 @@ class TestRememberMe:
         assert token_id is not None
         assert len(token_id) > 20
 
-        # Verify token in database
-        token = RememberMeToken.get(RememberMeToken.token_id == token_id)
+        # Verify token in database; only its hash is stored
+        token = RememberMeToken.get(RememberMeToken.token_hash == hash_session_token(token_id))
+        assert token.token_hash != token_id
         assert token.user_id == test_user.id
         assert token.revoked is False
 
@@ -253,14 +322,12 @@ class TestRememberMe:
         assert token is not None
         assert token.user_id == test_user.id
 
-    def test_validate_remember_me_token_expired(self, test_user):
+    def test_validate_remember_me_token_expired(self, test_user, advance_clock):
         """Test validating an expired remember-me token."""
         token_id = SessionManager.create_remember_me_token(user_id=test_user.id)
 
-        # Manually expire the token
-        token = RememberMeToken.get(RememberMeToken.token_id == token_id)
-        token.expires_at = datetime.datetime.now() - datetime.timedelta(days=1)
-        token.save()
+        # Move past the token's maximum age
+        advance_clock(datetime.timedelta(days=auth.REMEMBER_ME_MAX_AGE_DAYS + 1))
 
         # Validate should return None
         result = SessionManager.validate_remember_me_token(token_id)
@@ -282,7 +349,7 @@ class TestRememberMe:
 class TestAPIEndpoints:
     """Tests for API authentication endpoints."""
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_register_user(self, async_client):
         """Test user registration endpoint."""
         response = await async_client.post(
@@ -299,60 +366,32 @@ class TestAPIEndpoints:
         assert data["username"] == "apiuser"
         assert "user_id" in data
 
-    @pytest.mark.asyncio
-    async def test_login_success(self, async_client, test_user):
-        """Test successful login with session cookie."""
-        response = await async_client.post(
-            "/auth/login",
-            json={
-                "username": "testuser",
-                "password": "testpass123",
-                "remember_me": False
-            }
-        )
-
-        assert response.status_code == 200
-        data = response.json()
-        assert data["username"] == "testuser"
-
-        # Check session cookie
-        assert SESSION_COOKIE_NAME in response.cookies
-        session_cookie = response.cookies[SESSION_COOKIE_NAME]
-        assert session_cookie is not None
-
-    @pytest.mark.asyncio
-    async def test_login_with_remember_me(self, async_client, test_user):
-        """Test login with remember-me functionality."""
-        response = await async_client.post(
-            "/auth/login",
-            json={
-                "username": "testuser",
-                "password": "testpass123",
-                "remember_me": True
-            }
-        )
-
-        assert response.status_code == 200
-
-        # Check both cookies
-        assert SESSION_COOKIE_NAME in response.cookies
-        assert REMEMBER_ME_COOKIE_NAME in response.cookies
-
-    @pytest.mark.asyncio
-    async def test_login_wrong_password(self, async_client, test_user):
-        """Test login with wrong password."""
+    @pytest.mark.parametrize("remember_me,password,expected_status,expected_cookies", [
+        pytest.param(False, "testpass123", 200, {SESSION_COOKIE_NAME}, id="success"),
+        pytest.param(True, "testpass123", 200, {SESSION_COOKIE_NAME, REMEMBER_ME_COOKIE_NAME},
+                     id="remember_me"),
+        pytest.param(False, "wrongpassword", 401, set(), id="wrong_password"),
+    ])
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_login(self, async_client, test_user, remember_me, password,
+                         expected_status, expected_cookies):
+        """Test login outcomes and the cookies each one sets."""
         response = await async_client.post(
             "/auth/login",
             json={
                 "username": "testuser",
-                "password": "wrongpassword",
-                "remember_me": False
+                "password": password,
+                "remember_me": remember_me
             }
         )
 
-        assert response.status_code == 401
+        assert response.status_code == expected_status
+        for cookie_name in (SESSION_COOKIE_NAME, REMEMBER_ME_COOKIE_NAME):
+            assert (cookie_name in response.cookies) == (cookie_name in expected_cookies)
+        if expected_status == 200:
+            assert response.json()["username"] == "testuser"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_get_me_authenticated(self, async_client, test_user):
         """Test getting current user info when authenticated."""
         # Login first
@@ -370,15 +409,17 @@ class TestAPIEndpoints:
 
         assert response.status_code == 200
         data = response.json()
+        assert data["user_id"] == test_user.id
         assert data["username"] == "testuser"
+        assert data["auth_method"] == "session"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_get_me_unauthenticated(self, async_client):
         """Test accessing protected endpoint without authentication."""
         response = await async_client.get("/auth/me")
         assert response.status_code == 401
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_logout(self, async_client, test_user):
         """Test logout endpoint."""
         # Login first
@@ -400,68 +441,50 @@ class TestAPIEndpoints:
         response = await async_client.get("/auth/me")
         assert response.status_code == 401
 
-    @pytest.mark.asyncio
-    async def test_protected_endpoint(self, async_client, test_user):
-        """Test accessing protected torrent endpoint."""
-        # Login first
-        await async_client.post(
-            "/auth/login",
-            json={
-                "username": "testuser",
-                "password": "testpass123",
-                "remember_me": False
-            }
-        )
-
-        # Access protected endpoint
-        response = await async_client.get("/auth/me")
-
-        assert response.status_code == 200
-        data = response.json()
-        assert data["user_id"] == test_user.id
-        assert data["username"] == test_user.username
-        assert data["auth_method"] == "session"
-
 
 class TestCleanup:
     """Tests for cleanup operations."""
 
     def test_cleanup_expired_sessions(self, test_user):
         """Test cleaning up expired sessions."""
-        # Create sessions
-        session1 = SessionManager.create_session(user_id=test_user.id)
-        session2 = SessionManager.create_session(user_id=test_user.id)
+        now = datetime.datetime.now()
+        session1, session2 = generate_secure_token(), generate_secure_token()
 
-        # Expire first session
-        session = Session.get(Session.session_id == session1)
-        session.expires_at = datetime.datetime.now() - datetime.timedelta(days=1)
-        session.save()
+        # Seed one expired and one live session in a single insert
+        bulk_insert(Session, [
+            {'session_hash': hash_session_token(session1), 'user_id': test_user.id,
+             'expires_at': now - datetime.timedelta(days=1)},
+            {'session_hash': hash_session_token(session2), 'user_id': test_user.id,
+             'expires_at': now + datetime.timedelta(days=1)},
+        ])
 
         # Cleanup
         SessionManager.cleanup_expired_sessions()
 
         # First session should be gone
-        assert SessionManager.validate_session(session1) is None
+        assert not Session.select().where(Session.session_hash == hash_session_token(session1)).exists()
 
         # Second session should still exist
         assert SessionManager.validate_session(session2) is not None
 
     def test_cleanup_expired_tokens(self, test_user):
         """Test cleaning up expired remember-me tokens."""
-        # Create tokens
-        token1 = SessionManager.create_remember_me_token(user_id=test_user.id)
-        token2 = SessionManager.create_remember_me_token(user_id=test_user.id)
+        now = datetime.datetime.now()
+        token1, token2 = generate_secure_token(), generate_secure_token()
 
-        # Expire and revoke first token
-        token = RememberMeToken.get(RememberMeToken.token_id == token1)
-        token.expires_at = datetime.datetime.now() - datetime.timedelta(days=1)
-        token.save()
+        # Seed one expired and one live token in a single insert
+        bulk_insert(RememberMeToken, [
+            {'token_hash': hash_session_token(token1), 'user_id': test_user.id,
+             'expires_at': now - datetime.timedelta(days=1), 'revoked': False},
+            {'token_hash': hash_session_token(token2), 'user_id': test_user.id,
+             'expires_at': now + datetime.timedelta(days=1), 'revoked': False},
+        ])
 
         # Cleanup
         SessionManager.cleanup_expired_tokens()
 
         # First token should be gone
-        result = RememberMeToken.select().where(RememberMeToken.token_id == token1).count()
+        result = RememberMeToken.select().where(RememberMeToken.token_hash == hash_session_token(token1)).count()
         assert result == 0
 
         # Second token should still exist
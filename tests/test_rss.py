@@ -12,25 +12,23 @@ from peewee import SqliteDatabase
 os.environ["COOKIE_SECURE"] = "false"
 
 from torrent_manager.api import app
-from torrent_manager.auth import UserManager
+from torrent_manager.auth import generate_secure_token
 from torrent_manager.config import Config
 from torrent_manager.models import RSSFeed, RSSFeedItem, RememberMeToken, Session, TorrentServer, User
 from torrent_manager.rss import RSSService
 
+from .conftest import TEST_DB_PRAGMAS
+
 
 @pytest.fixture(autouse=True)
 def setup_test_db():
     """Bind RSS tests to an isolated in-memory database."""
     from torrent_manager import models as model_module
 
-    test_db = SqliteDatabase(':memory:')
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
     models_list = [User, Session, RememberMeToken, TorrentServer, RSSFeed, RSSFeedItem]
-    test_db.bind(models_list, bind_refs=False, bind_backrefs=False)
-
-    old_db = model_module.db
-    model_module.db._state.closed = True
-    for model in models_list:
-        model._meta.database = test_db
+    old_db = model_module.db.obj
+    model_module.db.initialize(test_db)
 
     test_db.connect()
     test_db.create_tables(models_list)
@@ -40,8 +38,7 @@ def setup_test_db():
     test_db.drop_tables(models_list)
     test_db.close()
 
-    for model in models_list:
-        model._meta.database = old_db
+    model_module.db.initialize(old_db)
 
 
 @pytest_asyncio.fixture
@@ -52,15 +49,15 @@ async def async_client():
 
 
 @pytest.fixture
-def test_user():
-    return UserManager.create_user(username='rssuser', password='secret')
+def test_user(test_password_hash):
+    return User.create(id=generate_secure_token(16), username='rssuser', password=test_password_hash)
 
 
 @pytest_asyncio.fixture
 async def authenticated_client(async_client, test_user):
     await async_client.post('/auth/login', json={
         'username': 'rssuser',
-        'password': 'secret',
+        'password': 'testpass123',
         'remember_me': False,
     })
     return async_client
@@ -1,7 +1,14 @@
 import pytest
 import os
-import time
+import socket
+import threading
+from xmlrpc import client
+
 from torrent_manager.config import Config
+from torrent_manager import rtorrent_client
+from torrent_manager.rtorrent_client import RTorrentClient
+
+from .conftest import DEBIAN_TORRENT, wait_until
 
 RTORRENT_RPC_URL = Config.RTORRENT_RPC_URL
 
@@ -9,19 +16,22 @@ RTORRENT_RPC_URL = Config.RTORRENT_RPC_URL
 class TestRTorrentClient:
     @pytest.fixture(autouse=True)
     def setup_method(self, rtorrent_client):
-        # Erase all torrents before each test
-        for torrent in rtorrent_client.list_torrents():
-            rtorrent_client.erase(torrent['info_hash'])
-        
+        # Erase all torrents before each test; list_torrents() is a single
+        # d.multicall2, and the erases go out together in one system.multicall
+        info_hashes = [torrent['info_hash'] for torrent in rtorrent_client.list_torrents()]
+        if info_hashes:
+            multicall = client.MultiCall(rtorrent_client.client)
+            for info_hash in info_hashes:
+                multicall.d.erase(info_hash)
+            multicall()
+
         # Wait for torrents to be removed
-        time.sleep(2)
-        
-        # Verify all torrents are removed
-        assert len(list(rtorrent_client.list_torrents())) == 0, "Failed to remove all torrents in setup"
+        removed = wait_until(lambda: not list(rtorrent_client.list_torrents()))
+        assert removed, "Failed to remove all torrents in setup"
 
     def test_add_and_remove_torrent(self, rtorrent_client):
         # Prepare test torrent file
-        torrent_file = "assets/debian-12.6.0-amd64-netinst.iso.torrent"
+        torrent_file = DEBIAN_TORRENT
         assert os.path.exists(torrent_file), f"Test torrent file {torrent_file} not found"
 
         # Get initial torrent count
@@ -32,8 +42,8 @@ class TestRTorrentClient:
         result = rtorrent_client.add_torrent(torrent_file)
         assert result is True, "Failed to add torrent"
 
-        # Check if torrent is added
-        time.sleep(2)  # Wait for torrent to be added
+        # Wait for torrent to be added
+        wait_until(lambda: len(list(rtorrent_client.list_torrents())) == initial_count + 1)
         torrents = list(rtorrent_client.list_torrents())
         assert len(torrents) == initial_count + 1, "Torrent not added to the list"
 
@@ -47,7 +57,7 @@ class TestRTorrentClient:
 
         # Remove torrent
         rtorrent_client.erase(info_hash)
-        time.sleep(2)  # Wait for torrent to be removed
+        wait_until(lambda: len(list(rtorrent_client.list_torrents())) == initial_count)
 
         # Check if torrent is removed
         torrents = list(rtorrent_client.list_torrents())
@@ -65,7 +75,7 @@ class TestRTorrentClient:
         assert result is True, "Failed to add torrent using magnet link"
 
         # Wait for torrent to be added and metadata to be fetched
-        time.sleep(10)
+        wait_until(lambda: any(t['name'] == "Big Buck Bunny" for t in rtorrent_client.list_torrents()))
 
         # Get the added torrent's info hash
         torrents = list(rtorrent_client.list_torrents())
@@ -89,22 +99,90 @@ class TestRTorrentClient:
             (2, 2),  # Set Big Buck Bunny.mp4 to high priority
         ]
 
-        for file_index, priority in file_priorities:
-            rtorrent_client.set_file_priority(info_hash, file_index, priority)
+        rtorrent_client.set_file_priorities(info_hash, file_priorities)
 
-        # Verify file priorities
+        # Verify file priorities; files() fetches them all with one f.multicall
         files = list(rtorrent_client.files(info_hash))
         for file, (_, expected_priority) in zip(files, file_priorities):
             assert file['priority'] == expected_priority, f"File {file['path']} has incorrect priority"
 
         # Remove torrent
         rtorrent_client.erase(info_hash)
-        time.sleep(2)  # Wait for torrent to be removed
+        wait_until(lambda: all(t['info_hash'] != info_hash for t in rtorrent_client.list_torrents()))
 
         # Check if torrent is removed
         torrents = list(rtorrent_client.list_torrents())
         assert all(t['info_hash'] != info_hash for t in torrents), "Failed to remove torrent"
 
 
+def _serve_one_scgi_request(server_sock, received):
+    conn, _ = server_sock.accept()
+    with conn:
+        data = b""
+        while True:
+            data += conn.recv(4096)
+            length, _, rest = data.partition(b":")
+            if length and len(rest) > int(length):
+                fields = rest[:int(length)].split(b"\x00")
+                headers = dict(zip(fields[::2], fields[1::2]))
+                body = rest[int(length) + 1:]
+                if len(body) >= int(headers[b"CONTENT_LENGTH"]):
+                    break
+        received.append((headers, client.loads(body)[1]))
+        response = client.dumps(("0.9.8",), methodresponse=True).encode()
+        conn.sendall(b"Status: 200 OK\r\nContent-Type: text/xml\r\n\r\n" + response)
+
+
+def test_scgi_unix_socket_transport(tmp_path):
+    socket_path = str(tmp_path / "rtorrent.sock")
+    received = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server_sock:
+        server_sock.bind(socket_path)
+        server_sock.listen(1)
+        thread = threading.Thread(target=_serve_one_scgi_request, args=(server_sock, received))
+        thread.start()
+
+        rtorrent = RTorrentClient(f"scgi://{socket_path}", timeout=5)
+        assert rtorrent.system.client_version() == "0.9.8"
+        thread.join(timeout=5)
+
+    headers, method = received[0]
+    assert method == "system.client_version"
+    assert headers[b"SCGI"] == b"1"
+    assert headers[b"REQUEST_URI"] == b"/RPC2"
+
+
+@pytest.mark.parametrize("family,host,url_host", [
+    pytest.param(socket.AF_INET, "127.0.0.1", "127.0.0.1", id="ipv4"),
+    pytest.param(socket.AF_INET6, "::1", "[::1]", id="ipv6",
+                 marks=pytest.mark.skipif(not socket.has_ipv6, reason="no IPv6 support")),
+])
+@pytest.mark.parametrize("with_port", [True, False], ids=["port", "default_port"])
+def test_scgi_tcp_transport(monkeypatch, family, host, url_host, with_port):
+    received = []
+    with socket.socket(family, socket.SOCK_STREAM) as server_sock:
+        try:
+            server_sock.bind((host, 0))
+        except OSError:
+            pytest.skip(f"cannot bind to {host}")
+        server_sock.listen(1)
+        port = server_sock.getsockname()[1]
+        thread = threading.Thread(target=_serve_one_scgi_request, args=(server_sock, received))
+        thread.start()
+
+        if with_port:
+            url = f"scgi://{url_host}:{port}"
+        else:
+            monkeypatch.setattr(rtorrent_client, "DEFAULT_SCGI_PORT", port)
+            url = f"scgi://{url_host}"
+        rtorrent = RTorrentClient(url, timeout=5)
+        assert rtorrent.system.client_version() == "0.9.8"
+        thread.join(timeout=5)
+
+    headers, method = received[0]
+    assert method == "system.client_version"
+    assert headers[b"SCGI"] == b"1"
+
+
 if __name__ == '__main__':
     pytest.main()
\ No newline at end of file
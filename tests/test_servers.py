@@ -11,122 +11,127 @@ from peewee import SqliteDatabase
 # Disable secure cookies for testing
 os.environ["COOKIE_SECURE"] = "false"
 
-from torrent_manager.api import app
-from torrent_manager.auth import UserManager
+from torrent_manager.api import app, SESSION_COOKIE_NAME
+from torrent_manager.auth import SessionManager, generate_secure_token
 from torrent_manager.models import User, Session, RememberMeToken, TorrentServer, db
 
+from .conftest import TEST_DB_PRAGMAS
 
-@pytest.fixture(autouse=True)
+
+@pytest.fixture(scope="module", autouse=True)
 def setup_test_db():
-    """Setup test database before each test."""
+    """Setup test database once for the module."""
     from torrent_manager import models as model_module
 
-    test_db = SqliteDatabase(':memory:')
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
 
     models_list = [User, Session, RememberMeToken, TorrentServer]
-    test_db.bind(models_list, bind_refs=False, bind_backrefs=False)
-
-    old_db = model_module.db
-    model_module.db._state.closed = True
-    for model in models_list:
-        model._meta.database = test_db
+    old_db = model_module.db.obj
+    model_module.db.initialize(test_db)
 
     test_db.connect()
-    test_db.create_tables(models_list)
+    with test_db.atomic():
+        test_db.create_tables(models_list)
 
-    yield
+    yield test_db
 
-    test_db.drop_tables(models_list)
+    # Closing an in-memory database discards its tables
     test_db.close()
+    model_module.db.initialize(old_db)
 
-    for model in models_list:
-        model._meta.database = old_db
+
+@pytest.fixture(autouse=True)
+def rollback_test_db(setup_test_db):
+    """Run each test in a transaction that is rolled back afterwards."""
+    with setup_test_db.atomic() as txn:
+        yield
+        txn.rollback()
 
 
-@pytest_asyncio.fixture
-async def async_client():
-    """Create async test client."""
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def _shared_client():
+    """Create one async test client for the module."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
 @pytest.fixture
-def test_user():
-    """Create a test user."""
-    return UserManager.create_user(
-        username="testuser",
-        password="testpass123"
+def async_client(_shared_client):
+    """Hand each test the shared client without cookies from earlier tests."""
+    _shared_client.cookies.clear()
+    return _shared_client
+
+
+def login_direct(client, user):
+    """Log the client in by creating a session row, skipping the /auth/login round trip."""
+    session_id = SessionManager.create_session(user_id=user.id)
+    # Drop any cookie the server set for an earlier user so only this one is sent
+    client.cookies.clear()
+    client.cookies.set(SESSION_COOKIE_NAME, session_id)
+    return client
+
+
+def create_user(username, password_hash):
+    """Insert a user row directly with an already-computed password hash."""
+    return User.create(
+        id=generate_secure_token(16),
+        username=username,
+        password=password_hash
     )
 
 
-@pytest_asyncio.fixture
-async def authenticated_client(async_client, test_user):
+def seed_server(user, **fields):
+    """Insert a server row directly, for tests whose subject is not POST /servers."""
+    return TorrentServer.create(id=generate_secure_token(16), user_id=user.id, **fields)
+
+
+@pytest.fixture
+def test_user(test_password_hash):
+    """Create a test user, reusing the session's precomputed password hash."""
+    return create_user("testuser", test_password_hash)
+
+
+@pytest.fixture
+def authenticated_client(async_client, test_user):
     """Create an authenticated async client."""
-    await async_client.post(
-        "/auth/login",
-        json={
-            "username": "testuser",
-            "password": "testpass123",
-            "remember_me": False
-        }
-    )
-    return async_client
+    return login_direct(async_client, test_user)
 
 
 class TestServerEndpoints:
     """Tests for server CRUD endpoints."""
 
-    @pytest.mark.asyncio
-    async def test_add_server_success(self, authenticated_client, test_user):
-        """Test adding a new server."""
-        response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Test rTorrent",
-                "server_type": "rtorrent",
-                "host": "localhost",
-                "port": 9080,
-                "rpc_path": "/RPC2"
-            }
-        )
+    @pytest.mark.parametrize("payload", [
+        pytest.param({
+            "name": "Test rTorrent",
+            "server_type": "rtorrent",
+            "host": "localhost",
+            "port": 9080,
+            "rpc_path": "/RPC2"
+        }, id="rtorrent"),
+        pytest.param({
+            "name": "Test Transmission",
+            "server_type": "transmission",
+            "host": "192.168.1.100",
+            "port": 9091,
+            "username": "admin",
+            "password": "secret"
+        }, id="transmission"),
+    ])
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_add_server(self, authenticated_client, test_user, payload):
+        """Test adding a server echoes back every submitted field."""
+        response = await authenticated_client.post("/servers", json=payload)
 
         assert response.status_code == 200
         data = response.json()
-        assert data["name"] == "Test rTorrent"
-        assert data["server_type"] == "rtorrent"
-        assert data["host"] == "localhost"
-        assert data["port"] == 9080
-        assert data["rpc_path"] == "/RPC2"
+        for field, value in payload.items():
+            assert data[field] == value
         assert data["enabled"] is True
         assert "id" in data
         assert data["user_id"] == test_user.id
 
-    @pytest.mark.asyncio
-    async def test_add_transmission_server(self, authenticated_client, test_user):
-        """Test adding a Transmission server."""
-        response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Test Transmission",
-                "server_type": "transmission",
-                "host": "192.168.1.100",
-                "port": 9091,
-                "username": "admin",
-                "password": "secret"
-            }
-        )
-
-        assert response.status_code == 200
-        data = response.json()
-        assert data["name"] == "Test Transmission"
-        assert data["server_type"] == "transmission"
-        assert data["host"] == "192.168.1.100"
-        assert data["port"] == 9091
-        assert data["username"] == "admin"
-        assert data["password"] == "secret"
-
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_add_server_unauthenticated(self, async_client):
         """Test that unauthenticated users cannot add servers."""
         response = await async_client.post(
@@ -141,28 +146,12 @@ class TestServerEndpoints:
 
         assert response.status_code == 401
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_list_servers(self, authenticated_client, test_user):
         """Test listing user's servers."""
         # Add two servers
-        await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Server 1",
-                "server_type": "rtorrent",
-                "host": "host1",
-                "port": 9080
-            }
-        )
-        await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Server 2",
-                "server_type": "transmission",
-                "host": "host2",
-                "port": 9091
-            }
-        )
+        seed_server(test_user, name="Server 1", server_type="rtorrent", host="host1", port=9080)
+        seed_server(test_user, name="Server 2", server_type="transmission", host="host2", port=9091)
 
         # List servers
         response = await authenticated_client.get("/servers")
@@ -173,33 +162,17 @@ class TestServerEndpoints:
         assert data[0]["name"] == "Server 1"
         assert data[1]["name"] == "Server 2"
 
-    @pytest.mark.asyncio
-    async def test_list_servers_user_isolation(self, async_client, test_user):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_list_servers_user_isolation(self, async_client, test_user, test_password_hash):
         """Test that users only see their own servers."""
         # Create second user
-        user2 = UserManager.create_user(username="user2", password="pass2")
+        user2 = create_user("user2", test_password_hash)
 
-        # Login as first user and add server
-        await async_client.post(
-            "/auth/login",
-            json={"username": "testuser", "password": "testpass123", "remember_me": False}
-        )
-        await async_client.post(
-            "/servers",
-            json={
-                "name": "User1 Server",
-                "server_type": "rtorrent",
-                "host": "host1",
-                "port": 9080
-            }
-        )
+        # Add a server for the first user
+        seed_server(test_user, name="User1 Server", server_type="rtorrent", host="host1", port=9080)
 
-        # Logout and login as second user
-        await async_client.post("/auth/logout")
-        await async_client.post(
-            "/auth/login",
-            json={"username": "user2", "password": "pass2", "remember_me": False}
-        )
+        # Login as second user
+        login_direct(async_client, user2)
 
         # User2 should see no servers
         response = await async_client.get("/servers")
@@ -207,20 +180,11 @@ class TestServerEndpoints:
         data = response.json()
         assert len(data) == 0
 
-    @pytest.mark.asyncio
-    async def test_get_server_by_id(self, authenticated_client):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_get_server_by_id(self, authenticated_client, test_user):
         """Test getting a specific server by ID."""
         # Add server
-        add_response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Test Server",
-                "server_type": "rtorrent",
-                "host": "localhost",
-                "port": 9080
-            }
-        )
-        server_id = add_response.json()["id"]
+        server_id = seed_server(test_user, name="Test Server", server_type="rtorrent", host="localhost", port=9080).id
 
         # Get server
         response = await authenticated_client.get(f"/servers/{server_id}")
@@ -230,26 +194,17 @@ class TestServerEndpoints:
         assert data["id"] == server_id
         assert data["name"] == "Test Server"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_get_server_not_found(self, authenticated_client):
         """Test getting a non-existent server."""
         response = await authenticated_client.get("/servers/nonexistent")
         assert response.status_code == 404
 
-    @pytest.mark.asyncio
-    async def test_update_server(self, authenticated_client):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_update_server(self, authenticated_client, test_user):
         """Test updating a server."""
         # Add server
-        add_response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Old Name",
-                "server_type": "rtorrent",
-                "host": "oldhost",
-                "port": 9080
-            }
-        )
-        server_id = add_response.json()["id"]
+        server_id = seed_server(test_user, name="Old Name", server_type="rtorrent", host="oldhost", port=9080).id
 
         # Update server
         response = await authenticated_client.put(
@@ -269,7 +224,7 @@ class TestServerEndpoints:
         assert data["port"] == 9090
         assert data["enabled"] is False
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_update_server_not_found(self, authenticated_client):
         """Test updating a non-existent server."""
         response = await authenticated_client.put(
@@ -278,20 +233,11 @@ class TestServerEndpoints:
         )
         assert response.status_code == 404
 
-    @pytest.mark.asyncio
-    async def test_delete_server(self, authenticated_client):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_delete_server(self, authenticated_client, test_user):
         """Test deleting a server."""
         # Add server
-        add_response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "To Delete",
-                "server_type": "rtorrent",
-                "host": "localhost",
-                "port": 9080
-            }
-        )
-        server_id = add_response.json()["id"]
+        server_id = seed_server(test_user, name="To Delete", server_type="rtorrent", host="localhost", port=9080).id
 
         # Delete server
         response = await authenticated_client.delete(f"/servers/{server_id}")
@@ -304,26 +250,17 @@ class TestServerEndpoints:
         get_response = await authenticated_client.get(f"/servers/{server_id}")
         assert get_response.status_code == 404
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="module")
     async def test_delete_server_not_found(self, authenticated_client):
         """Test deleting a non-existent server."""
         response = await authenticated_client.delete("/servers/nonexistent")
         assert response.status_code == 404
 
-    @pytest.mark.asyncio
-    async def test_test_server_endpoint(self, authenticated_client):
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_test_server_endpoint(self, authenticated_client, test_user):
         """Test the server connection test endpoint."""
-        # Add server (will fail connection since it doesn't exist)
-        add_response = await authenticated_client.post(
-            "/servers",
-            json={
-                "name": "Test Server",
-                "server_type": "rtorrent",
-                "host": "localhost",
-                "port": 9999  # Non-existent port
-            }
-        )
-        server_id = add_response.json()["id"]
+        # Add server on a non-existent port (connection will fail)
+        server_id = seed_server(test_user, name="Test Server", server_type="rtorrent", host="localhost", port=9999).id
 
         # Test connection (should fail)
         response = await authenticated_client.post(f"/servers/{server_id}/test")
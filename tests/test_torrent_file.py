@@ -1,7 +1,11 @@
+import hashlib
 import unittest
 import os
+import tempfile
 from urllib.parse import unquote
 
+import bencodepy
+
 from torrent_manager.torrent_file import TorrentFile
 
 
@@ -48,6 +52,12 @@ class TestTorrentFile(unittest.TestCase):
         self.assertEqual(len(first_piece_hash), 40)
         self.assertTrue(all(c in '0123456789abcdef' for c in first_piece_hash))
 
+    def test_iter_piece_hashes(self):
+        hashes = list(self.torrent_file.iter_piece_hashes())
+        self.assertEqual(len(hashes), self.torrent_file.num_pieces())
+        self.assertEqual(hashes[0], self.torrent_file.piece_hash(0))
+        self.assertEqual(hashes[-1], self.torrent_file.piece_hash(len(hashes) - 1))
+
     def test_trackers(self):
         trackers = self.torrent_file.trackers()
         expected_trackers = [
@@ -73,12 +83,70 @@ class TestTorrentFile(unittest.TestCase):
         self.assertTrue(self.torrent_file.validate())
 
     def test_save(self):
-        temp_path = "temp_test_torrent.torrent"
-        self.torrent_file.save(temp_path)
-        self.assertTrue(os.path.exists(temp_path))
-        
-        # Clean up
-        os.remove(temp_path)
+        # Write into a temporary directory rather than the working directory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "temp_test_torrent.torrent")
+            self.torrent_file.save(temp_path)
+            self.assertTrue(os.path.exists(temp_path))
+
+
+class TestTorrentFileVerify(unittest.TestCase):
+    """Piece verification against a small generated multi-file torrent."""
+
+    PIECE_LENGTH = 16
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_path = self.temp_dir.name
+        contents = {"a.bin": os.urandom(40), "sub/b.bin": os.urandom(29)}
+
+        for rel_path, data in contents.items():
+            path = os.path.join(self.base_path, "album", rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+
+        blob = b"".join(contents.values())
+        pieces = b"".join(
+            hashlib.sha1(blob[i:i + self.PIECE_LENGTH]).digest()
+            for i in range(0, len(blob), self.PIECE_LENGTH)
+        )
+        torrent = {
+            b"announce": b"http://tracker.example/announce",
+            b"info": {
+                b"name": b"album",
+                b"piece length": self.PIECE_LENGTH,
+                b"pieces": pieces,
+                b"files": [
+                    {b"length": len(data), b"path": [p.encode() for p in rel_path.split("/")]}
+                    for rel_path, data in contents.items()
+                ],
+            },
+        }
+        self.torrent_path = os.path.join(self.base_path, "album.torrent")
+        with open(self.torrent_path, "wb") as f:
+            f.write(bencodepy.encode(torrent))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_verify_complete_data(self):
+        torrent = TorrentFile(self.torrent_path)
+        self.assertEqual(torrent.num_pieces(), 5)
+        self.assertEqual(torrent.verify(self.base_path, max_workers=2), [])
+
+    def test_verify_reports_corrupt_and_missing_pieces(self):
+        # Corrupt byte 20 (piece 1) and truncate the second file (pieces 2-4)
+        path_a = os.path.join(self.base_path, "album", "a.bin")
+        with open(path_a, "r+b") as f:
+            f.seek(20)
+            byte = f.read(1)
+            f.seek(20)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        os.remove(os.path.join(self.base_path, "album", "sub", "b.bin"))
+
+        torrent = TorrentFile(self.torrent_path)
+        self.assertEqual(torrent.verify(self.base_path), [1, 2, 3, 4])
 
 
 if __name__ == '__main__':
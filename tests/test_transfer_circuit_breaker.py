@@ -10,9 +10,11 @@ import time
 from unittest.mock import Mock, patch
 from peewee import SqliteDatabase
 from torrent_manager.transfer import TransferService
-from torrent_manager.models import TransferJob, TorrentServer
+from torrent_manager.models import TransferJob, TorrentServer, User
 from torrent_manager.polling import ServerCache
-from torrent_manager.auth import UserManager
+from torrent_manager.auth import generate_secure_token
+
+from .conftest import TEST_DB_PRAGMAS
 
 
 @pytest.fixture(autouse=True)
@@ -20,7 +22,7 @@ def setup_test_db():
     """Setup test database before each test."""
     from torrent_manager import models as model_module
 
-    test_db = SqliteDatabase(':memory:')
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
     models = [
         model_module.User,
         model_module.TorrentServer,
@@ -31,7 +33,8 @@ def setup_test_db():
         model_module.UserTorrentSettings,
     ]
 
-    test_db.bind(models)
+    old_db = model_module.db.obj
+    model_module.db.initialize(test_db)
     test_db.connect()
     test_db.create_tables(models)
 
@@ -39,12 +42,17 @@ def setup_test_db():
 
     test_db.drop_tables(models)
     test_db.close()
+    model_module.db.initialize(old_db)
 
 
 @pytest.fixture
-def test_user():
-    """Create a test user."""
-    return UserManager.create_user("test_user", "password")
+def test_user(test_password_hash):
+    """Create a test user, reusing the session's precomputed password hash."""
+    return User.create(
+        id=generate_secure_token(16),
+        username="test_user",
+        password=test_password_hash
+    )
 
 
 @pytest.fixture
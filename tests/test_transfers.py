@@ -12,26 +12,24 @@ from peewee import SqliteDatabase
 os.environ["COOKIE_SECURE"] = "false"
 
 from torrent_manager.api import app
-from torrent_manager.auth import UserManager
+from torrent_manager.auth import generate_secure_token
 from torrent_manager.models import (
     User, Session, RememberMeToken, TorrentServer, TransferJob, UserTorrentSettings, db
 )
 
+from .conftest import TEST_DB_PRAGMAS
+
 
 @pytest.fixture(autouse=True)
 def setup_test_db():
     """Setup test database before each test."""
     from torrent_manager import models as model_module
 
-    test_db = SqliteDatabase(':memory:')
+    test_db = SqliteDatabase(':memory:', pragmas=TEST_DB_PRAGMAS)
 
     models_list = [User, Session, RememberMeToken, TorrentServer, TransferJob, UserTorrentSettings]
-    test_db.bind(models_list, bind_refs=False, bind_backrefs=False)
-
-    old_db = model_module.db
-    model_module.db._state.closed = True
-    for model in models_list:
-        model._meta.database = test_db
+    old_db = model_module.db.obj
+    model_module.db.initialize(test_db)
 
     test_db.connect()
     test_db.create_tables(models_list)
@@ -41,8 +39,7 @@ def setup_test_db():
     test_db.drop_tables(models_list)
     test_db.close()
 
-    for model in models_list:
-        model._meta.database = old_db
+    model_module.db.initialize(old_db)
 
 
 @pytest_asyncio.fixture
@@ -54,11 +51,12 @@ async def async_client():
 
 
 @pytest.fixture
-def test_user():
-    """Create a test user."""
-    return UserManager.create_user(
+def test_user(test_password_hash):
+    """Create a test user, reusing the session's precomputed password hash."""
+    return User.create(
+        id=generate_secure_token(16),
         username="testuser",
-        password="testpass123"
+        password=test_password_hash
     )
 
 
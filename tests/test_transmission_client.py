@@ -1,12 +1,13 @@
 import json
 import pytest
 import os
-import time
 from unittest.mock import Mock, patch
 from torrent_manager.config import Config
 from torrent_manager.transmission_client import TransmissionClient
 from transmission_rpc.error import TransmissionError, TransmissionConnectError
 
+from .conftest import wait_until
+
 
 TRANSMISSION_HOST = Config.TRANSMISSION_HOST
 TRANSMISSION_PORT = Config.TRANSMISSION_PORT
@@ -23,10 +24,8 @@ class TestTransmissionClient:
             transmission_client.erase(torrent['info_hash'])
         
         # Wait for torrents to be removed
-        time.sleep(2)
-        
-        # Verify all torrents are removed
-        assert len(list(transmission_client.list_torrents())) == 0, "Failed to remove all torrents in setup"
+        removed = wait_until(lambda: not list(transmission_client.list_torrents()))
+        assert removed, "Failed to remove all torrents in setup"
 
     def test_add_and_remove_torrent(self, transmission_client):
         # Prepare test torrent file
@@ -41,8 +40,8 @@ class TestTransmissionClient:
         result = transmission_client.add_torrent(torrent_file)
         assert result is True, "Failed to add torrent"
 
-        # Check if torrent is added
-        time.sleep(2)  # Wait for torrent to be added
+        # Wait for torrent to be added
+        wait_until(lambda: len(list(transmission_client.list_torrents())) == initial_count + 1)
         torrents = list(transmission_client.list_torrents())
         assert len(torrents) == initial_count + 1, "Torrent not added to the list"
 
@@ -56,7 +55,7 @@ class TestTransmissionClient:
 
         # Remove torrent
         transmission_client.erase(info_hash)
-        time.sleep(2)  # Wait for torrent to be removed
+        wait_until(lambda: len(list(transmission_client.list_torrents())) == initial_count)
 
         # Check if torrent is removed
         torrents = list(transmission_client.list_torrents())
@@ -73,7 +72,7 @@ class TestTransmissionClient:
         assert result is True, "Failed to add torrent using magnet link"
 
         # Wait for torrent to be added and metadata to be fetched
-        time.sleep(10)
+        wait_until(lambda: any(t['name'] == "Big Buck Bunny" for t in transmission_client.list_torrents()))
 
         # Get the added torrent's info hash
         torrents = list(transmission_client.list_torrents())
@@ -107,7 +106,7 @@ class TestTransmissionClient:
 
         # Remove torrent
         transmission_client.erase(info_hash)
-        time.sleep(2)  # Wait for torrent to be removed
+        wait_until(lambda: all(t['info_hash'] != info_hash for t in transmission_client.list_torrents()))
 
         # Check if torrent is removed
         torrents = list(transmission_client.list_torrents())
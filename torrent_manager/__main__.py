@@ -6,20 +6,40 @@ import sys
 from .manager import Manager
 from .config import Config
 from .logger import logger
+from .models import init_db
 
 
 CONFIG_PATH = Config.CONFIG_PATH
 
 
+# Parsed config file, reused until the file's mtime changes
+_config_cache = {"mtime": None, "config": None}
+
+
+def _config_mtime():
+    try:
+        return os.stat(CONFIG_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
 def load_config():
+    mtime = _config_mtime()
+    if _config_cache["config"] is not None and _config_cache["mtime"] == mtime:
+        return _config_cache["config"]
+
     config = configparser.ConfigParser()
-    if os.path.exists(CONFIG_PATH):
+    if mtime is not None:
         config.read(CONFIG_PATH)
+    _config_cache.update(mtime=mtime, config=config)
     return config
 
 def save_config(config):
-    with open(CONFIG_PATH, 'w') as configfile:
+    # Write to a sibling file and swap it in so readers never see a partial file
+    tmp_path = CONFIG_PATH + ".tmp"
+    with open(tmp_path, 'w') as configfile:
         config.write(configfile)
+    os.replace(tmp_path, CONFIG_PATH)
+    _config_cache.update(mtime=_config_mtime(), config=config)
 
 def get_setting(args):
     config = load_config()
@@ -37,17 +57,20 @@ def set_setting(args):
     logger(f"Setting {args.section}.{args.key} = {args.value}")
 
 def set_defaults(config):
-    for key, value in Config.__dict__.items():
+    for key in list(Config.__dict__):
         if key.isupper() and not key.startswith("__"):
-            config[key] = str(value)
+            config[key] = str(getattr(Config, key))
 
 def run_maintenance(args):
     config = load_config()
     # Update Config with values from config file
-    for section in config.sections():
-        for key, value in config[section].items():
-            setattr(Config, key.upper(), value)
+    Config.load_overrides({
+        key.upper(): value
+        for section in config.sections()
+        for key, value in config[section].items()
+    })
     
+    init_db()
     manager = Manager()
     manager.run_maintenance()
 
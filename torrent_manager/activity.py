@@ -1,7 +1,7 @@
 import datetime
 from peewee import fn
 
-from .models import Status
+from .models import Status, bulk_insert
 from .config import Config
 from .dbs import sdb as db
 
@@ -12,29 +12,43 @@ class Activity:
         if self.db.is_closed():
             self.db.connect()
 
-    def record_torrent_status(self, info_hash, server_id=None, is_seeding=True,
-                              is_private=False, timestamp=None):
+    @staticmethod
+    def _status_row(info_hash, server_id=None, is_seeding=True,
+                    is_private=False, timestamp=None):
         if timestamp is None:
             timestamp = datetime.datetime.now()
-        Status.create(
-            torrent_hash=info_hash,
-            server_id=server_id,
-            status='seeding' if is_seeding else 'stopped',
-            progress=1.0 if is_seeding else 0.0,
-            seeders=0,
-            leechers=0,
-            down_rate=0,
-            up_rate=0,
-            is_private=is_private,
-            timestamp=timestamp,
-        )
+        return {
+            'torrent_hash': info_hash,
+            'server_id': server_id,
+            'status': 'seeding' if is_seeding else 'stopped',
+            'progress': 1.0 if is_seeding else 0.0,
+            'seeders': 0,
+            'leechers': 0,
+            'down_rate': 0,
+            'up_rate': 0,
+            'is_private': is_private,
+            'timestamp': timestamp,
+        }
+
+    def record_torrent_status(self, info_hash, server_id=None, is_seeding=True,
+                              is_private=False, timestamp=None):
+        Status.create(**self._status_row(
+            info_hash, server_id, is_seeding, is_private, timestamp))
+
+    def record_torrent_statuses(self, statuses):
+        """
+        Record several status snapshots in one transaction.
+
+        Each item is a dict of record_torrent_status keyword arguments.
+        """
+        bulk_insert(Status, [self._status_row(**status) for status in statuses])
 
     def is_torrent_private(self, info_hash) -> bool:
         """Get the private status from the most recent status record."""
         latest = (Status
                   .select()
                   .where(Status.torrent_hash == info_hash)
-                  .order_by(Status.timestamp.desc())
+                  .order_by(Status.timestamp.desc(), Status.id.desc())
                   .first())
         return latest.is_private if latest else False
 
@@ -49,7 +63,7 @@ class Activity:
         logs = (Status
                 .select()
                 .where(Status.torrent_hash == info_hash)
-                .order_by(Status.timestamp))
+                .order_by(Status.timestamp, Status.id))
 
         seeding_duration = 0
         last_seeding_time = None
@@ -1,3 +1,4 @@
+import re
 from typing import Optional, Tuple
 from fastapi import Request, HTTPException, status, Depends
 from torrent_manager.auth import SessionManager, UserManager, ApiKeyManager
@@ -13,6 +14,20 @@ def get_client_info(request: Request) -> Tuple[Optional[str], Optional[str]]:
     user_agent = request.headers.get("user-agent")
     return ip_address, user_agent
 
+# API keys are secrets.token_urlsafe() output; anything else cannot match a stored key
+_API_KEY_RE = re.compile(r"[A-Za-z0-9_-]{20,128}")
+
+def extract_bearer(auth_header: Optional[str]) -> Optional[str]:
+    """
+    Return the token from an "Authorization: Bearer <token>" header, or None.
+
+    Compares a fixed 7-character prefix (scheme matched case-insensitively)
+    instead of splitting the whole header.
+    """
+    if not auth_header or auth_header[:7].lower() != "bearer ":
+        return None
+    return auth_header[7:].strip() or None
+
 async def get_current_user(request: Request) -> User:
     """
     Dependency to get the current authenticated user.
@@ -27,21 +42,17 @@ async def get_current_user(request: Request) -> User:
     - Remember-me token (if session invalid)
     """
     # First, check for API key in Authorization header
-    auth_header = request.headers.get("authorization")
-    if auth_header:
-        # Expected format: "Bearer <api_key>"
-        parts = auth_header.split()
-        if len(parts) == 2 and parts[0].lower() == "bearer":
-            api_key = parts[1]
-            key = ApiKeyManager.validate_api_key(api_key)
-            if key:
-                user = UserManager.get_user_by_id(key.user_id)
-                if user:
-                    # Store user in request state
-                    request.state.user = user
-                    request.state.auth_method = "api_key"
-                    logger.debug(f"Authenticated user {user.username} via API key")
-                    return user
+    api_key = extract_bearer(request.headers.get("authorization"))
+    if api_key and _API_KEY_RE.fullmatch(api_key):
+        key = ApiKeyManager.validate_api_key(api_key)
+        if key:
+            user = UserManager.get_user_by_id(key.user_id)
+            if user:
+                # Store user in request state
+                request.state.user = user
+                request.state.auth_method = "api_key"
+                logger.debug(f"Authenticated user {user.username} via API key")
+                return user
 
     # Check for session cookie
     session_id = request.cookies.get(SESSION_COOKIE_NAME)
@@ -52,8 +63,10 @@ async def get_current_user(request: Request) -> User:
         if session:
             user = UserManager.get_user_by_id(session.user_id)
             if user:
-                # Store session in request state for middleware
+                # Store session in request state for middleware; only the
+                # cookie holds the raw session ID
                 request.state.session = session
+                request.state.session_id = session_id
                 request.state.user = user
                 request.state.auth_method = "session"
                 return user
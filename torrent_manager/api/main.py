@@ -24,7 +24,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from torrent_manager.config import Config
 from torrent_manager.logger import logger
-from torrent_manager.auth import SessionManager, ApiKeyManager
+from torrent_manager.auth import SessionManager, ApiKeyManager, API_KEY_USAGE_FLUSH_INTERVAL_SECONDS
+from torrent_manager.models import init_db
 from torrent_manager.trackers import fetch_trackers
 from torrent_manager.polling import get_poller
 from torrent_manager.transfer import get_transfer_service
@@ -71,20 +72,23 @@ async def seeding_monitor_task():
                     if not server.enabled:
                         continue
 
+                    # Record status for duration tracking in one transaction per server
+                    activity.record_torrent_statuses([
+                        {
+                            'info_hash': torrent['info_hash'],
+                            'server_id': server.id,
+                            'is_seeding': bool(torrent.get('is_active') and torrent.get('complete')),
+                            'is_private': torrent.get('is_private', False),
+                        }
+                        for torrent in cache.torrents
+                    ])
+
                     # Process torrents from cache
                     for torrent in cache.torrents:
                         info_hash = torrent['info_hash']
                         is_seeding = torrent.get('is_active') and torrent.get('complete')
                         is_private = torrent.get('is_private', False)
 
-                        # Record status for duration tracking
-                        activity.record_torrent_status(
-                            info_hash,
-                            server_id=server.id,
-                            is_seeding=is_seeding,
-                            is_private=is_private
-                        )
-
                         # Check for auto-pause if actively seeding
                         if is_seeding:
                             duration = activity.calculate_seeding_duration(
@@ -115,6 +119,16 @@ async def seeding_monitor_task():
         await asyncio.sleep(Config.SEEDING_CHECK_INTERVAL)
 
 
+async def api_key_usage_flush_task():
+    """Background task to write queued API key last_used_at timestamps."""
+    while True:
+        await asyncio.sleep(API_KEY_USAGE_FLUSH_INTERVAL_SECONDS)
+        try:
+            ApiKeyManager.flush_usage()
+        except Exception as e:
+            logger.error(f"Error flushing API key usage: {e}")
+
+
 def _start_media_worker():
     """Start media_server transcoding worker in background thread."""
     if getattr(_start_media_worker, "_started", False):
@@ -132,6 +146,7 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
     logger.info("Starting Torrent Manager API")
+    init_db()
     SessionManager.cleanup_expired_sessions()
     SessionManager.cleanup_expired_tokens()
     ApiKeyManager.cleanup_expired_keys()
@@ -147,6 +162,9 @@ async def lifespan(app: FastAPI):
     logger.info(f"Seeding monitor started (interval: {Config.SEEDING_CHECK_INTERVAL}s, "
                 f"auto-pause: {Config.AUTO_PAUSE_SEEDING})")
 
+    # Start background API key usage writer
+    usage_task = asyncio.create_task(api_key_usage_flush_task())
+
     # Start background torrent poller
     poller = get_poller()
     poller_task = asyncio.create_task(poller.run())
@@ -169,6 +187,7 @@ async def lifespan(app: FastAPI):
     poller.stop()
     poller_task.cancel()
     monitor_task.cancel()
+    usage_task.cancel()
     try:
         await rss_task
     except asyncio.CancelledError:
@@ -185,6 +204,11 @@ async def lifespan(app: FastAPI):
         await monitor_task
     except asyncio.CancelledError:
         pass
+    try:
+        await usage_task
+    except asyncio.CancelledError:
+        pass
+    ApiKeyManager.flush_usage()
     logger.info("Torrent Manager API shutdown complete")
 
 
@@ -238,11 +262,12 @@ async def session_renewal_middleware(request: Request, call_next):
         # Only renew on index page loads
         elif request.url.path == "/":
             # Try to renew existing session (sliding expiration)
-            renewed, new_expires_at = SessionManager.renew_session(session.session_id)
+            session_id = request.state.session_id
+            renewed, new_expires_at = SessionManager.renew_session(session_id)
 
             if renewed:
                 # Reissue cookie with new expiry
-                set_session_cookie(response, session.session_id, new_expires_at)
+                set_session_cookie(response, session_id, new_expires_at)
                 logger.debug(f"Reissued session cookie with sliding expiration")
 
     return response
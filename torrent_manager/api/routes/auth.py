@@ -83,7 +83,7 @@ async def login(request: LoginRequest, req: Request, response: Response):
 
     Optionally creates a remember-me token for longer-lived authentication.
     """
-    user = UserManager.authenticate_user(request.username, request.password)
+    user = await UserManager.authenticate_user_async(request.username, request.password)
 
     if not user:
         raise HTTPException(
@@ -197,7 +197,7 @@ async def list_api_keys(user: User = Depends(get_current_user)):
 
     return [
         {
-            "prefix": key.api_key[:8],  # Only show prefix
+            "prefix": key.prefix,  # Only show prefix
             "name": key.name,
             "created_at": key.created_at.isoformat(),
             "last_used_at": key.last_used_at.isoformat() if key.last_used_at else None,
@@ -219,13 +219,7 @@ async def revoke_api_key(
     The key will be marked as revoked and can no longer be used for authentication.
     """
     # Find the key by prefix
-    keys = ApiKeyManager.list_user_api_keys(user.id)
-    matching_key = None
-
-    for key in keys:
-        if key.api_key.startswith(key_prefix):
-            matching_key = key
-            break
+    matching_key = ApiKeyManager.find_user_api_key(user.id, key_prefix)
 
     if not matching_key:
         raise HTTPException(
@@ -234,7 +228,7 @@ async def revoke_api_key(
         )
 
     # Revoke the key
-    ApiKeyManager.revoke_api_key(matching_key.api_key)
+    ApiKeyManager.revoke_api_key_by_hash(matching_key.key_hash)
 
     return {
         "message": "API key revoked successfully",
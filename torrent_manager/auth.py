@@ -14,8 +14,14 @@ Note: This module includes monkey-patches for bcrypt compatibility:
 These patches ensure compatibility with passlib's internal initialization while maintaining security.
 """
 
+import asyncio
 import datetime
+import hashlib
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional, Tuple
 
 # Monkey-patch bcrypt to handle password length limit and version detection before passlib loads
@@ -43,14 +49,22 @@ if not hasattr(_bcrypt, '__about__'):
     _bcrypt.__about__ = _About()
 
 from passlib.context import CryptContext
+from peewee import Case, chunked
 
-from .models import User, Session, RememberMeToken, ApiKey
+from .config import Config
+from .models import User, Session, RememberMeToken, ApiKey, bulk_insert
 from .logger import logger
 
 
 # Password hashing context
 # Note: Using bcrypt without relying on truncate_error since bcrypt 5.0+ enforces 72-byte limit strictly
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_ROUNDS = Config.PASSWORD_HASH_ROUNDS
+_pwd_context_settings = {}
+if PASSWORD_HASH_ROUNDS:
+    _pwd_context_settings["bcrypt__rounds"] = PASSWORD_HASH_ROUNDS
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", **_pwd_context_settings)
+if PASSWORD_HASH_ROUNDS:
+    logger.warning(f"Password hashing uses {PASSWORD_HASH_ROUNDS} rounds; do not lower this in production")
 
 
 # Session configuration (ITP-safe: < 7 days for sliding window)
@@ -60,12 +74,41 @@ SESSION_MAX_AGE_DAYS = 30
 # Remember-me configuration (longer-lived)
 REMEMBER_ME_MAX_AGE_DAYS = 90
 
+# Validated API key cache. Revocation clears the entry in this process; other
+# worker processes may keep accepting a revoked key for up to the TTL.
+API_KEY_CACHE_TTL_SECONDS = 60
+API_KEY_CACHE_MAX_SIZE = 1024
+
+
+# API key last_used_at writes are coalesced and flushed in the background
+API_KEY_USAGE_FLUSH_INTERVAL_SECONDS = 2
+API_KEY_USAGE_FLUSH_BATCH_SIZE = 500
+
+
+# Leading characters of an API key stored in the clear for display/revocation
+API_KEY_PREFIX_LENGTH = 8
+
+
+def _now() -> datetime.datetime:
+    """Current local time; tests patch this to move the clock forward."""
+    return datetime.datetime.now()
+
 
 def generate_secure_token(length: int = 32) -> str:
     """Generate a cryptographically secure random token."""
     return secrets.token_urlsafe(length)
 
 
+def hash_api_key(api_key: str) -> str:
+    """Return the SHA-256 hex digest under which an API key is stored."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+def hash_session_token(token: str) -> str:
+    """Return the SHA-256 hex digest under which a session id or remember-me token is stored."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
 def _truncate_password(password: str) -> str:
     """
     Truncate password to 72 bytes for bcrypt compatibility.
@@ -97,6 +140,111 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(_truncate_password(plain_password), hashed_password)
 
 
+@dataclass(frozen=True)
+class ValidatedApiKey:
+    """
+    Snapshot of an API key that passed validation.
+
+    Frozen so that cache hits can hand the same object to concurrent requests.
+    """
+    key_hash: str
+    prefix: str
+    user_id: str
+    expires_at: Optional[datetime.datetime]
+
+
+class _ApiKeyCache:
+    """
+    LRU cache of validated API keys with a per-entry TTL.
+
+    Entries are keyed by the stored key hash so plaintext keys are not kept as
+    dictionary keys, and expire at the earlier of the TTL and the API key's own
+    expiry.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[ValidatedApiKey, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key_hash: str, now: float) -> Optional[ValidatedApiKey]:
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            key, valid_until = entry
+            if valid_until <= now:
+                del self._entries[key_hash]
+                return None
+            self._entries.move_to_end(key_hash)
+            return key
+
+    def put(self, key: ValidatedApiKey, now: float):
+        valid_until = now + self.ttl
+        if key.expires_at:
+            valid_until = min(valid_until, key.expires_at.timestamp())
+        with self._lock:
+            self._entries[key.key_hash] = (key, valid_until)
+            self._entries.move_to_end(key.key_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key_hash: str):
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_api_key_cache = _ApiKeyCache(API_KEY_CACHE_MAX_SIZE, API_KEY_CACHE_TTL_SECONDS)
+
+
+class _ApiKeyUsageWriter:
+    """
+    Coalesces API key last_used_at updates so validation never writes.
+
+    Only the latest timestamp per key is kept; flush() writes them with one
+    UPDATE ... CASE statement per batch.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._pending: dict[str, datetime.datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key_hash: str, used_at: datetime.datetime):
+        with self._lock:
+            self._pending[key_hash] = used_at
+
+    def discard(self, key_hash: str):
+        with self._lock:
+            self._pending.pop(key_hash, None)
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        updated = 0
+        for batch in chunked(pending.items(), self.batch_size):
+            # CASE values are bound as-is, so convert them the way the field
+            # would rather than leaving datetimes to sqlite3's default adapter
+            cases = [
+                (key_hash, ApiKey.last_used_at.db_value(used_at))
+                for key_hash, used_at in batch
+            ]
+            updated += ApiKey.update(
+                last_used_at=Case(ApiKey.key_hash, cases)
+            ).where(
+                ApiKey.key_hash.in_([key_hash for key_hash, _ in batch])
+            ).execute()
+        return updated
+
+
+_api_key_usage = _ApiKeyUsageWriter(API_KEY_USAGE_FLUSH_BATCH_SIZE)
+
+
 class SessionManager:
     """
     Manages user sessions with sliding expiration and remember-me functionality.
@@ -112,15 +260,17 @@ class SessionManager:
         """
         Create a new session for a user.
 
+        Only the session ID's hash is stored; the ID itself goes to the client.
+
         Returns:
             session_id: The generated session ID
         """
         session_id = generate_secure_token()
-        now = datetime.datetime.now()
+        now = _now()
         expires_at = now + datetime.timedelta(days=max_age_days)
 
         Session.create(
-            session_id=session_id,
+            session_hash=hash_session_token(session_id),
             user_id=user_id,
             created_at=now,
             last_activity=now,
@@ -141,8 +291,8 @@ class SessionManager:
             Session object if valid, None otherwise
         """
         try:
-            session = Session.get(Session.session_id == session_id)
-            now = datetime.datetime.now()
+            session = Session.get(Session.session_hash == hash_session_token(session_id))
+            now = _now()
 
             # Check if session is expired
             if session.expires_at < now:
@@ -161,7 +311,7 @@ class SessionManager:
 
         ITP-safe: Only renew if last activity was within the sliding window (< 7 days).
         """
-        now = datetime.datetime.now()
+        now = _now()
         time_since_activity = now - session.last_activity
 
         # Renew if activity is within the sliding window
@@ -183,7 +333,7 @@ class SessionManager:
             logger.info(f"Session {session_id[:8]}... outside sliding window, not renewing")
             return False, None
 
-        now = datetime.datetime.now()
+        now = _now()
         new_expires_at = now + datetime.timedelta(days=SESSION_MAX_AGE_DAYS)
 
         # Update session
@@ -198,7 +348,7 @@ class SessionManager:
     def delete_session(session_id: str) -> bool:
         """Delete a session."""
         try:
-            session = Session.get(Session.session_id == session_id)
+            session = Session.get(Session.session_hash == hash_session_token(session_id))
             session.delete_instance()
             logger.info(f"Deleted session {session_id[:8]}...")
             return True
@@ -208,7 +358,7 @@ class SessionManager:
     @staticmethod
     def cleanup_expired_sessions():
         """Remove all expired sessions from the database."""
-        now = datetime.datetime.now()
+        now = _now()
         deleted = Session.delete().where(Session.expires_at < now).execute()
         if deleted > 0:
             logger.info(f"Cleaned up {deleted} expired sessions")
@@ -222,15 +372,17 @@ class SessionManager:
         """
         Create a remember-me token for longer-lived authentication.
 
+        Only the token's hash is stored; the token itself goes to the client.
+
         Returns:
             token_id: The generated token ID
         """
         token_id = generate_secure_token()
-        now = datetime.datetime.now()
+        now = _now()
         expires_at = now + datetime.timedelta(days=REMEMBER_ME_MAX_AGE_DAYS)
 
         RememberMeToken.create(
-            token_id=token_id,
+            token_hash=hash_session_token(token_id),
             user_id=user_id,
             created_at=now,
             expires_at=expires_at,
@@ -251,8 +403,8 @@ class SessionManager:
             RememberMeToken object if valid, None otherwise
         """
         try:
-            token = RememberMeToken.get(RememberMeToken.token_id == token_id)
-            now = datetime.datetime.now()
+            token = RememberMeToken.get(RememberMeToken.token_hash == hash_session_token(token_id))
+            now = _now()
 
             # Check if token is expired or revoked
             if token.expires_at < now or token.revoked:
@@ -267,7 +419,7 @@ class SessionManager:
     def revoke_remember_me_token(token_id: str) -> bool:
         """Revoke a remember-me token."""
         try:
-            token = RememberMeToken.get(RememberMeToken.token_id == token_id)
+            token = RememberMeToken.get(RememberMeToken.token_hash == hash_session_token(token_id))
             token.revoked = True
             token.save()
             logger.info(f"Revoked remember-me token {token_id[:8]}...")
@@ -278,7 +430,7 @@ class SessionManager:
     @staticmethod
     def cleanup_expired_tokens():
         """Remove all expired or revoked remember-me tokens."""
-        now = datetime.datetime.now()
+        now = _now()
         deleted = RememberMeToken.delete().where(
             (RememberMeToken.expires_at < now) | (RememberMeToken.revoked == True)
         ).execute()
@@ -307,10 +459,11 @@ class ApiKeyManager:
             api_key: The generated API key
         """
         api_key = generate_secure_token()
-        now = datetime.datetime.now()
+        now = _now()
 
         ApiKey.create(
-            api_key=api_key,
+            key_hash=hash_api_key(api_key),
+            prefix=api_key[:API_KEY_PREFIX_LENGTH],
             user_id=user_id,
             name=name,
             created_at=now,
@@ -318,50 +471,115 @@ class ApiKeyManager:
             revoked=False
         )
 
-        logger.info(f"Created API key '{name}' ({api_key[:8]}...) for user {user_id}")
+        logger.info(f"Created API key '{name}' ({api_key[:API_KEY_PREFIX_LENGTH]}...) for user {user_id}")
         return api_key
 
     @staticmethod
-    def validate_api_key(api_key: str) -> Optional[ApiKey]:
+    def bulk_create_api_keys(
+        user_id: str,
+        names: list[str],
+        expires_at: Optional[datetime.datetime] = None
+    ) -> list[str]:
+        """
+        Create several API keys for a user in one transaction.
+
+        Returns:
+            The generated API keys, in the same order as names
+        """
+        api_keys = [generate_secure_token() for _ in names]
+        now = _now()
+
+        bulk_insert(ApiKey, [
+            {
+                'key_hash': hash_api_key(api_key),
+                'prefix': api_key[:API_KEY_PREFIX_LENGTH],
+                'user_id': user_id,
+                'name': name,
+                'created_at': now,
+                'expires_at': expires_at,
+                'revoked': False,
+            }
+            for api_key, name in zip(api_keys, names)
+        ])
+
+        logger.info(f"Created {len(api_keys)} API keys for user {user_id}")
+        return api_keys
+
+    @staticmethod
+    def validate_api_key(api_key: str) -> Optional[ValidatedApiKey]:
         """
         Validate an API key and check if it's expired or revoked.
 
+        Keys are looked up by their SHA-256 hash. Recently validated keys are
+        served from an in-process cache. last_used_at is queued for the next
+        flush_usage() rather than written here.
+
+        The clock is read once per call and shared by the cache expiry check,
+        the key expiry check and last_used_at.
+
         Returns:
-            ApiKey object if valid, None otherwise
+            ValidatedApiKey snapshot if valid, None otherwise
         """
+        key_hash = hash_api_key(api_key)
+        timestamp = time.time()
+        now = datetime.datetime.fromtimestamp(timestamp)
+
+        cached = _api_key_cache.get(key_hash, timestamp)
+        if cached is not None:
+            _api_key_usage.record(key_hash, now)
+            return cached
+
         try:
-            key = ApiKey.get(ApiKey.api_key == api_key)
-            now = datetime.datetime.now()
+            key = ApiKey.get(ApiKey.key_hash == key_hash)
 
             # Check if key is revoked
             if key.revoked:
-                logger.info(f"API key {api_key[:8]}... is revoked")
+                logger.info(f"API key {key.prefix}... is revoked")
                 return None
 
             # Check if key is expired
             if key.expires_at and key.expires_at < now:
-                logger.info(f"API key {api_key[:8]}... is expired")
+                logger.info(f"API key {key.prefix}... is expired")
                 return None
 
             # Update last used timestamp
-            key.last_used_at = now
-            key.save()
-
-            return key
+            _api_key_usage.record(key_hash, now)
+
+            validated = ValidatedApiKey(
+                key_hash=key.key_hash,
+                prefix=key.prefix,
+                user_id=key.user_id,
+                expires_at=key.expires_at,
+            )
+            _api_key_cache.put(validated, timestamp)
+            return validated
         except ApiKey.DoesNotExist:
             return None
 
+    @staticmethod
+    def flush_usage() -> int:
+        """
+        Write queued last_used_at timestamps to the database.
+
+        Returns:
+            Number of keys updated
+        """
+        return _api_key_usage.flush()
+
     @staticmethod
     def revoke_api_key(api_key: str) -> bool:
         """Revoke an API key."""
-        try:
-            key = ApiKey.get(ApiKey.api_key == api_key)
-            key.revoked = True
-            key.save()
-            logger.info(f"Revoked API key {api_key[:8]}...")
-            return True
-        except ApiKey.DoesNotExist:
+        return ApiKeyManager.revoke_api_key_by_hash(hash_api_key(api_key))
+
+    @staticmethod
+    def revoke_api_key_by_hash(key_hash: str) -> bool:
+        """Revoke an API key identified by its stored hash."""
+        updated = ApiKey.update(revoked=True).where(ApiKey.key_hash == key_hash).execute()
+        _api_key_cache.discard(key_hash)
+        if not updated:
             return False
+        logger.info(f"Revoked API key with hash {key_hash[:8]}...")
+        return True
 
     @staticmethod
     def list_user_api_keys(user_id: str, include_revoked: bool = False) -> list[ApiKey]:
@@ -382,13 +600,30 @@ class ApiKeyManager:
 
         return list(query)
 
+    @staticmethod
+    def find_user_api_key(user_id: str, key_prefix: str) -> Optional[ApiKey]:
+        """
+        Find a user's active API key by its displayed prefix.
+
+        Returns:
+            The first matching ApiKey, or None
+        """
+        return ApiKey.select().where(
+            (ApiKey.user_id == user_id)
+            & (ApiKey.prefix == key_prefix[:API_KEY_PREFIX_LENGTH])
+            & (ApiKey.revoked == False)
+        ).first()
+
     @staticmethod
     def delete_api_key(api_key: str) -> bool:
         """Permanently delete an API key."""
+        key_hash = hash_api_key(api_key)
         try:
-            key = ApiKey.get(ApiKey.api_key == api_key)
+            key = ApiKey.get(ApiKey.key_hash == key_hash)
             key.delete_instance()
-            logger.info(f"Deleted API key {api_key[:8]}...")
+            _api_key_cache.discard(key_hash)
+            _api_key_usage.discard(key_hash)
+            logger.info(f"Deleted API key {key.prefix}...")
             return True
         except ApiKey.DoesNotExist:
             return False
@@ -396,7 +631,7 @@ class ApiKeyManager:
     @staticmethod
     def cleanup_expired_keys():
         """Remove all expired API keys."""
-        now = datetime.datetime.now()
+        now = _now()
         deleted = ApiKey.delete().where(
             (ApiKey.expires_at < now) & (ApiKey.expires_at.is_null(False))
         ).execute()
@@ -426,17 +661,32 @@ class UserManager:
     @staticmethod
     def authenticate_user(username: str, password: str) -> Optional[User]:
         """Authenticate a user by username and password."""
-        try:
-            user = User.get(User.username == username)
-            if verify_password(password, user.password):
-                logger.info(f"User {username} authenticated successfully")
-                return user
-            else:
-                logger.warning(f"Failed authentication attempt for user {username}")
-                return None
-        except User.DoesNotExist:
+        user = User.get_or_none(User.username == username)
+        password_ok = user is not None and verify_password(password, user.password)
+        return UserManager._authentication_result(username, user, password_ok)
+
+    @staticmethod
+    async def authenticate_user_async(username: str, password: str) -> Optional[User]:
+        """
+        Authenticate a user without blocking the event loop on bcrypt.
+
+        The user lookup stays on the calling thread, which owns the database
+        connection; only the password verification runs in a worker thread.
+        """
+        user = User.get_or_none(User.username == username)
+        password_ok = user is not None and await asyncio.to_thread(verify_password, password, user.password)
+        return UserManager._authentication_result(username, user, password_ok)
+
+    @staticmethod
+    def _authentication_result(username: str, user: Optional[User], password_ok: bool) -> Optional[User]:
+        if user is None:
             logger.warning(f"Authentication attempt for non-existent user {username}")
             return None
+        if not password_ok:
+            logger.warning(f"Failed authentication attempt for user {username}")
+            return None
+        logger.info(f"User {username} authenticated successfully")
+        return user
 
     @staticmethod
     def get_user_by_id(user_id: str) -> Optional[User]:
@@ -226,7 +226,7 @@ def get_torrent_db_info(info_hash: str, server_id: str) -> Dict[str, Any]:
         statuses = Status.select().where(
             (Status.torrent_hash == info_hash_upper) &
             (Status.server_id == server_id)
-        ).order_by(Status.timestamp.desc()).limit(10)
+        ).order_by(Status.timestamp.desc(), Status.id.desc()).limit(10)
         result["statuses"] = [
             {
                 "status": s.status,
@@ -248,7 +248,7 @@ def get_torrent_db_info(info_hash: str, server_id: str) -> Dict[str, Any]:
         actions = Action.select().where(
             (Action.torrent_hash == info_hash_upper) &
             (Action.server_id == server_id)
-        ).order_by(Action.timestamp.desc()).limit(20)
+        ).order_by(Action.timestamp.desc(), Action.id.desc()).limit(20)
         result["actions"] = [
             {
                 "action": a.action,
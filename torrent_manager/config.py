@@ -3,11 +3,19 @@
 Defines default configuration values at module level and exposes a Config class
 that loads values from environment variables (from ~/.env and project .env).
 All configuration options can be overridden via environment variables.
+
+Settings whose defaults are expensive to produce (temporary database paths) are
+declared with _LazySetting and only resolved the first time they are read.
 """
 
+import atexit
+import functools
 import os
+import secrets
+import shutil
 import tempfile
 import dotenv
+from loguru import logger
 
 
 # Load environment from multiple locations (later files override earlier)
@@ -50,9 +58,6 @@ TRANSMISSION_PORT = 9091
 TRANSMISSION_USERNAME = ""
 TRANSMISSION_PASSWORD = ""
 
-SQLITE_DB_PATH = tempfile.NamedTemporaryFile().name
-REDISLITE_DB_PATH = tempfile.NamedTemporaryFile().name
-
 CONTAINER_NAME = "rtorrent-manager"
 
 # Tracker augmentation for public torrents
@@ -99,6 +104,42 @@ METADATA_USE_LLM_FALLBACK = False     # Use LLM for low-confidence identificatio
 TMDB_API_KEY = None                   # TMDB API key for metadata enrichment
 
 
+def _temp_db_path():
+    """Return an unused path in the system temp directory without creating a file."""
+    return os.path.join(tempfile.gettempdir(), f"tmp{secrets.token_hex(6)}")
+
+
+@functools.lru_cache(maxsize=None)
+def _test_dir():
+    """Create (once) a scratch directory for TestConfig paths, removed at exit."""
+    path = tempfile.mkdtemp(prefix="tm-test-")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+class _LazySetting:
+    """
+    Class attribute resolved from the environment on first access.
+
+    The resolved value replaces the descriptor on the owning class, so later
+    reads are plain attribute lookups and setattr() overrides keep working.
+    """
+
+    def __init__(self, default_factory, from_env=True):
+        self.default_factory = default_factory
+        self.from_env = from_env
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        value = os.getenv(self.name) if self.from_env else None
+        if value is None:
+            value = self.default_factory()
+        setattr(owner, self.name, value)
+        return value
+
+
 class Config:
     DEBUG = os.getenv("DEBUG", DEBUG)
     VERBOSE = os.getenv("VERBOSE", VERBOSE)
@@ -133,8 +174,8 @@ class Config:
     TRANSMISSION_USERNAME = os.getenv("TRANSMISSION_USERNAME", TRANSMISSION_USERNAME)
     TRANSMISSION_PASSWORD = os.getenv("TRANSMISSION_PASSWORD", TRANSMISSION_PASSWORD)
 
-    SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", SQLITE_DB_PATH)
-    REDISLITE_DB_PATH = os.getenv("REDISLITE_DB_PATH", REDISLITE_DB_PATH)
+    SQLITE_DB_PATH = _LazySetting(_temp_db_path)
+    REDISLITE_DB_PATH = _LazySetting(_temp_db_path)
 
     CONTAINER_NAME = os.getenv("CONTAINER_NAME", CONTAINER_NAME)
 
@@ -150,6 +191,9 @@ class Config:
     # Security Configuration
     # Default to False for local HTTP development. Set COOKIE_SECURE=true in production with HTTPS.
     COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
+    # Work factor (bcrypt log2 rounds) for new password hashes; unset keeps
+    # passlib's default. Lowered only for test runs.
+    PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "0")) or None
 
     # Tracker augmentation for public torrents
     TRACKERS_LIST_URL = os.getenv("TRACKERS_LIST_URL", TRACKERS_LIST_URL)
@@ -194,6 +238,30 @@ class Config:
     METADATA_USE_LLM_FALLBACK = os.getenv("METADATA_USE_LLM_FALLBACK", str(METADATA_USE_LLM_FALLBACK)).lower() == "true"
     TMDB_API_KEY = os.getenv("TMDB_API_KEY", TMDB_API_KEY)
 
+    @classmethod
+    def load_overrides(cls, overrides):
+        """
+        Apply a mapping of setting overrides (e.g. from the CLI config file).
+
+        String values are coerced to the type of the current setting so callers
+        see the same types as for environment-derived values. Values that fail
+        to coerce are logged and skipped, leaving the current setting in place.
+        """
+        for key, value in overrides.items():
+            current = getattr(cls, key, None)
+            if isinstance(value, str):
+                try:
+                    if isinstance(current, bool):
+                        value = value.lower() == "true"
+                    elif isinstance(current, int):
+                        value = int(value)
+                    elif isinstance(current, float):
+                        value = float(value)
+                except ValueError:
+                    logger.warning(f"Ignoring config override {key}={value!r}: expected {type(current).__name__}")
+                    continue
+            setattr(cls, key, value)
+
     @property
     def API_BASE_URL(self):
         """Construct the full API base URL."""
@@ -203,11 +271,16 @@ class Config:
         return base
 
 
+def _test_path(filename):
+    return _LazySetting(lambda: os.path.join(_test_dir(), filename), from_env=False)
+
+
 class TestConfig:
     CONTAINER_NAME = "rtorrent-manager-test"
-    
-    LOG_PATH = tempfile.NamedTemporaryFile().name
-    DB_PATH = tempfile.NamedTemporaryFile().name
-    
-    SQLITE_DB_PATH = tempfile.NamedTemporaryFile().name
-    REDISLITE_DB_PATH = tempfile.NamedTemporaryFile().name
+
+    # Paths live in one scratch directory created on first access
+    LOG_PATH = _test_path("rtorrent_manager.log")
+    DB_PATH = _test_path("activity_logs.db")
+
+    SQLITE_DB_PATH = _test_path("sqlite.db")
+    REDISLITE_DB_PATH = _test_path("redislite.db")
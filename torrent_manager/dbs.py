@@ -12,6 +12,8 @@ WAL pragmas configured:
 - synchronous=normal: Balance between safety and performance
 - busy_timeout=30000: Wait up to 30 seconds for locks to clear
 - cache_size=-64000: Use 64MB page cache for better performance
+- mmap_size=268435456: Memory-map up to 256MB of the file to avoid read syscalls
+- temp_store=memory: Keep temporary tables and sort indexes in memory
 """
 from redislite import Redis
 from peewee import SqliteDatabase
@@ -29,6 +31,8 @@ sdb = SqliteDatabase(
         'journal_mode': 'wal',
         'synchronous': 'normal',
         'cache_size': -64000,
+        'mmap_size': 268435456,
+        'temp_store': 'memory',
         'foreign_keys': 1,
         'ignore_check_constraints': 0,
         'busy_timeout': 30000,
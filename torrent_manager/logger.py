@@ -10,12 +10,14 @@ LOG_ROTATION = Config.LOG_ROTATION
 LOG_RETENTION = Config.LOG_RETENTION
 
 
-# Log to a file
+# Log to a file; enqueue hands writes to a background thread so async
+# handlers never block on disk I/O
 logger.add(
     LOG_PATH,
     rotation="1 week",
     retention="1 month",
     level=LOG_LEVEL,
+    enqueue=True,
 )
 
 # Log to console
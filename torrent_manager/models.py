@@ -6,11 +6,26 @@ torrent server configuration (TorrentServer with HTTP download, local mount, and
 auto-download via rsync over SSH), torrent tracking (Torrent, Status, Action),
 file transfer management (TransferJob, UserTorrentSettings), automatic metadata
 identification (TorrentMetadata), and RSS feed automation (RSSFeed, RSSFeedItem).
+
+Tables are created by init_db(), which entry points call on startup.
+Models reach the database through the `db` proxy, which points at the
+application's SQLite database; tests repoint it with db.initialize().
+The `timestamp` columns (User, UserTorrent, Torrent, Status, Action) store
+integer Unix seconds via TimestampField, which still reads back as a datetime.
 """
 
 import datetime
-from peewee import Model, CharField, DateTimeField, IntegerField, FloatField, BooleanField
-from .dbs import sdb as db
+import hashlib
+import weakref
+from peewee import (
+    Model, CharField, DateTimeField, IntegerField, FloatField, BooleanField, TimestampField,
+    DatabaseProxy, chunked,
+)
+from .dbs import sdb
+
+
+db = DatabaseProxy()
+db.initialize(sdb)
 
 
 class BaseModel(Model):
@@ -23,7 +38,7 @@ class User(BaseModel):
     username = CharField(index=True, unique=True)
     password = CharField()
     is_admin = BooleanField(default=False)
-    timestamp = DateTimeField(default=datetime.datetime.now)
+    timestamp = TimestampField(default=datetime.datetime.now)  # Unix seconds
     download_cookies = CharField(null=True)
     download_headers = CharField(null=True)
 
@@ -84,8 +99,11 @@ class Session(BaseModel):
     """
     Stores user session data with sliding expiration.
     Sessions are reissued on each meaningful request to provide sliding window authentication.
+
+    Only the SHA-256 hex digest of the session id is stored, so a leaked
+    database does not leak usable session cookies.
     """
-    session_id = CharField(primary_key=True, max_length=64)
+    session_hash = CharField(primary_key=True, max_length=64)
     user_id = CharField(index=True)
     created_at = DateTimeField(default=datetime.datetime.now)
     last_activity = DateTimeField(default=datetime.datetime.now)
@@ -98,8 +116,10 @@ class RememberMeToken(BaseModel):
     """
     Stores remember-me tokens for longer-lived authentication.
     These tokens can mint new sessions when the session expires.
+
+    Like sessions, tokens are stored as their SHA-256 hex digest.
     """
-    token_id = CharField(primary_key=True, max_length=64)
+    token_hash = CharField(primary_key=True, max_length=64)
     user_id = CharField(index=True)
     created_at = DateTimeField(default=datetime.datetime.now)
     expires_at = DateTimeField()
@@ -112,21 +132,43 @@ class ApiKey(BaseModel):
     """
     Stores API keys for programmatic authentication.
     API keys are an alternative to session-based authentication for scripts and automation.
+
+    Only the SHA-256 hex digest of a key is stored, as the primary key, so
+    validation is a single index probe and a leaked database does not leak
+    usable keys. The first characters are kept in the clear for display and
+    revocation by prefix.
     """
-    api_key = CharField(primary_key=True, max_length=64)
-    user_id = CharField(index=True)
+    key_hash = CharField(primary_key=True, max_length=64)
+    prefix = CharField(max_length=8)
+    user_id = CharField()
     name = CharField()  # User-provided name to identify the key
     created_at = DateTimeField(default=datetime.datetime.now)
     last_used_at = DateTimeField(null=True)
     expires_at = DateTimeField(null=True)  # Optional expiration
     revoked = BooleanField(default=False)
 
+    class Meta:
+        # Leads with user_id, so it also serves plain per-user lookups
+        indexes = (
+            (("user_id", "revoked", "expires_at"), False),
+            (("user_id", "prefix"), False),
+        )
+
+
+# Only keys with an expiry are ever cleaned up, so the index skips the rest
+ApiKey.add_index(ApiKey.index(ApiKey.expires_at).where(ApiKey.expires_at.is_null(False)))
+
 
 class UserTorrent(BaseModel):
-    user = CharField(index=True)
+    user = CharField()
     torrent_hash = CharField(index=True)
     server_id = CharField(index=True, null=True)
-    timestamp = DateTimeField(default=datetime.datetime.now)
+    timestamp = TimestampField(default=datetime.datetime.now)  # Unix seconds
+
+    class Meta:
+        indexes = (
+            (("user", "torrent_hash"), False),
+        )
 
 
 class Torrent(BaseModel):
@@ -137,11 +179,11 @@ class Torrent(BaseModel):
     files = CharField()
     size = IntegerField()
     is_private = BooleanField(default=False)
-    timestamp = DateTimeField(default=datetime.datetime.now)
+    timestamp = TimestampField(default=datetime.datetime.now)  # Unix seconds
 
 
 class Status(BaseModel):
-    torrent_hash = CharField(index=True)
+    torrent_hash = CharField()
     server_id = CharField(index=True, null=True)
     status = CharField()  # e.g., 'downloading', 'seeding', 'stopped'
     progress = FloatField()  # 0.0 to 1.0
@@ -150,14 +192,19 @@ class Status(BaseModel):
     down_rate = IntegerField()
     up_rate = IntegerField()
     is_private = BooleanField(default=False)
-    timestamp = DateTimeField(default=datetime.datetime.now)
+    timestamp = TimestampField(default=datetime.datetime.now)  # Unix seconds
+
+    class Meta:
+        indexes = (
+            (("torrent_hash", "timestamp"), False),
+        )
 
 
 class Action(BaseModel):
     torrent_hash = CharField(index=True)
     server_id = CharField(index=True, null=True)
     action = CharField()  # e.g., 'add', 'stop', 'remove'
-    timestamp = DateTimeField(default=datetime.datetime.now)
+    timestamp = TimestampField(default=datetime.datetime.now)  # Unix seconds
 
 
 class TransferJob(BaseModel):
@@ -313,23 +360,134 @@ class RSSFeedItem(BaseModel):
         )
 
 
-db.connect(reuse_if_open=True)
-db.create_tables(
-    [
-        User,
-        Session,
-        RememberMeToken,
-        ApiKey,
-        TorrentServer,
-        UserTorrent,
-        Torrent,
-        Status,
-        Action,
-        TransferJob,
-        UserTorrentSettings,
-        TorrentMetadata,
-        RSSFeed,
-        RSSFeedItem,
-    ],
-    safe=True,
-)
+ALL_MODELS = [
+    User,
+    Session,
+    RememberMeToken,
+    ApiKey,
+    TorrentServer,
+    UserTorrent,
+    Torrent,
+    Status,
+    Action,
+    TransferJob,
+    UserTorrentSettings,
+    TorrentMetadata,
+    RSSFeed,
+    RSSFeedItem,
+]
+
+_initialized_dbs = weakref.WeakSet()
+
+
+def init_db(database=None):
+    """
+    Connect to the database and create any missing tables.
+
+    Called explicitly by entry points (API startup, CLI maintenance) rather than
+    at import time, so importing the models for type references stays cheap.
+    Repeated calls for the same database are no-ops.
+    """
+    database = database or db.obj
+    if database in _initialized_dbs:
+        return
+    database.connect(reuse_if_open=True)
+    # Migrations run first so existing tables gain new columns before
+    # create_tables builds indexes on them
+    _run_migrations(database)
+    database.create_tables(ALL_MODELS, safe=True)
+    _initialized_dbs.add(database)
+
+
+def bulk_insert(model, rows, batch_size=50):
+    """
+    Insert many rows for a model in a single transaction.
+
+    Rows are dicts of field values. Batches stay under SQLite's legacy limit of
+    999 bound variables per statement for models with up to ~20 columns.
+    """
+    if not rows:
+        return
+    with model._meta.database.atomic():
+        for batch in chunked(rows, batch_size):
+            model.insert_many(batch).execute()
+
+
+def _migrate_text_timestamps(database):
+    """
+    Convert DATETIME text left by older schemas into Unix seconds.
+
+    TimestampField columns used to be DateTimeField, which stores local-time
+    ISO strings; the 'utc' modifier treats them as local time, matching how
+    TimestampField converts naive datetimes.
+    """
+    for model in ALL_MODELS:
+        table = model._meta.table_name
+        if not database.table_exists(table):
+            continue
+        for field in model._meta.sorted_fields:
+            if isinstance(field, TimestampField):
+                column = field.column_name
+                database.execute_sql(
+                    f'UPDATE "{table}" '
+                    f"SET \"{column}\" = CAST(strftime('%s', \"{column}\", 'utc') AS INTEGER) "
+                    f"WHERE typeof(\"{column}\") = 'text'"
+                )
+
+
+def _migrate_api_key_hashes(database):
+    """Replace plaintext API keys with their SHA-256 digest and a display prefix."""
+    table = ApiKey._meta.table_name
+    if not database.table_exists(table):
+        return
+    columns = {column.name for column in database.get_columns(table)}
+    if 'api_key' not in columns:
+        return
+    database.execute_sql(f'ALTER TABLE "{table}" RENAME COLUMN "api_key" TO "key_hash"')
+    database.execute_sql(f'ALTER TABLE "{table}" ADD COLUMN "prefix" VARCHAR(8) NOT NULL DEFAULT \'\'')
+    rows = database.execute_sql(f'SELECT "key_hash" FROM "{table}"').fetchall()
+    for (api_key,) in rows:
+        database.execute_sql(
+            f'UPDATE "{table}" SET "key_hash" = ?, "prefix" = ? WHERE "key_hash" = ?',
+            (hashlib.sha256(api_key.encode('utf-8')).hexdigest(), api_key[:8], api_key),
+        )
+
+
+def _migrate_session_token_hashes(database):
+    """Replace plaintext session ids and remember-me tokens with their SHA-256 digest."""
+    for model, old_column, new_column in (
+        (Session, 'session_id', 'session_hash'),
+        (RememberMeToken, 'token_id', 'token_hash'),
+    ):
+        table = model._meta.table_name
+        if not database.table_exists(table):
+            continue
+        columns = {column.name for column in database.get_columns(table)}
+        if old_column not in columns:
+            continue
+        database.execute_sql(f'ALTER TABLE "{table}" RENAME COLUMN "{old_column}" TO "{new_column}"')
+        rows = database.execute_sql(f'SELECT "{new_column}" FROM "{table}"').fetchall()
+        for (token,) in rows:
+            database.execute_sql(
+                f'UPDATE "{table}" SET "{new_column}" = ? WHERE "{new_column}" = ?',
+                (hashlib.sha256(token.encode('utf-8')).hexdigest(), token),
+            )
+
+
+# Schema migrations in order. The index of the last one applied is kept in
+# PRAGMA user_version so later startups skip them without scanning tables.
+_MIGRATIONS = [
+    _migrate_text_timestamps,
+    _migrate_api_key_hashes,
+    _migrate_session_token_hashes,
+]
+
+
+def _run_migrations(database):
+    version = database.execute_sql('PRAGMA user_version').fetchone()[0]
+    if version >= len(_MIGRATIONS):
+        return
+    with database.atomic():
+        for migration in _MIGRATIONS[version:]:
+            migration(database)
+        database.execute_sql(f'PRAGMA user_version = {len(_MIGRATIONS)}')
@@ -7,8 +7,11 @@ and querying torrent information. Features detailed error messages for
 invalid or malformed torrent files and configurable connection and operation
 timeouts to prevent blocking on unreachable or slow servers.
 
-Supports both HTTP and HTTPS connections with automatic selection of the
-appropriate transport layer based on the URL scheme. Timeouts apply to both
+Supports HTTP and HTTPS connections, plus rTorrent's native SCGI protocol
+(scgi://host[:port] over TCP, port 5000 by default, or scgi:///path/to/socket
+over a Unix socket), with automatic selection of the appropriate transport
+layer based on the URL scheme. SCGI skips the web server and HTTP framing in
+front of rTorrent; the payload is still XML-RPC. Timeouts apply to both
 connection establishment and individual XMLRPC operations.
 
 Error handling includes:
@@ -42,6 +45,7 @@ import socket
 import tempfile
 import time
 from typing import Any, Dict, Generator, List, Optional
+from urllib.parse import urlsplit
 from xmlrpc import client
 from http.client import HTTPConnection, HTTPSConnection
 
@@ -56,6 +60,8 @@ from .utils import rate_limited_get
 
 
 RTORRENT_RPC_URL = Config.RTORRENT_RPC_URL
+# Port for scgi://host URLs that omit one; rTorrent examples use scgi_port = :5000
+DEFAULT_SCGI_PORT = 5000
 
 
 class TimeoutTransport(client.Transport):
@@ -96,6 +102,57 @@ class TimeoutSafeTransport(client.SafeTransport):
             socket.setdefaulttimeout(old_timeout)
 
 
+class ScgiTransport(client.Transport):
+    """XMLRPC transport that talks SCGI directly to rTorrent over TCP or a Unix socket."""
+    def __init__(self, timeout=10, socket_path=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+        self.socket_path = socket_path
+
+    def request(self, host, handler, request_body, verbose=False):
+        if isinstance(request_body, str):
+            request_body = request_body.encode()
+        headers = (
+            b"CONTENT_LENGTH\x00%d\x00SCGI\x001\x00REQUEST_METHOD\x00POST\x00REQUEST_URI\x00%s\x00"
+            % (len(request_body), handler.encode())
+        )
+
+        sock = self._connect(host)
+        try:
+            sock.sendall(b"%d:%s," % (len(headers), headers) + request_body)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            sock.close()
+
+        # rTorrent answers with CGI-style headers followed by the XML body
+        _, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+        parser, unmarshaller = self.getparser()
+        parser.feed(body)
+        parser.close()
+        return unmarshaller.close()
+
+    def _connect(self, host):
+        if not self.socket_path:
+            # urlsplit strips the brackets from IPv6 literals such as [::1]:5000
+            address = urlsplit(f"//{host}")
+            return socket.create_connection(
+                (address.hostname, address.port or DEFAULT_SCGI_PORT), timeout=self.timeout
+            )
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+
 class RTorrentClient(BaseTorrentClient):
     def __init__(self, url: str = RTORRENT_RPC_URL, view: str = "main", timeout: int = 10):
         self.url = url
@@ -103,9 +160,13 @@ class RTorrentClient(BaseTorrentClient):
         # Extract hostname for error messages
         from urllib.parse import urlparse
         parsed = urlparse(url)
-        self.hostname = parsed.hostname or parsed.netloc or url
-        # Use SafeTransport for HTTPS, Transport for HTTP
-        if url.startswith('https://'):
+        self.hostname = parsed.hostname or parsed.netloc or parsed.path or url
+        # Use SafeTransport for HTTPS, ScgiTransport for SCGI, Transport for HTTP
+        if url.startswith('scgi://'):
+            # ServerProxy only accepts http(s) URLs; the transport ignores the scheme
+            transport = ScgiTransport(timeout=timeout, socket_path=None if parsed.netloc else parsed.path)
+            url = f"http://{parsed.netloc or 'localhost'}/RPC2"
+        elif url.startswith('https://'):
             transport = TimeoutSafeTransport(timeout=timeout)
         else:
             transport = TimeoutTransport(timeout=timeout)
@@ -630,8 +691,17 @@ class RTorrentClient(BaseTorrentClient):
             self._handle_xmlrpc_error(e, "set file priority")
 
     def set_file_priorities(self, info_hash, priorities):
+        # One system.multicall round trip instead of one request per file
+        multicall = client.MultiCall(self.client)
         for file_index, priority in priorities:
-            self.set_file_priority(info_hash, file_index, priority)
+            multicall.f.priority.set(f"{info_hash}:f{file_index}", priority)
+        try:
+            # Iterating the results raises the first per-call Fault
+            return list(multicall())
+        except (socket.gaierror, socket.timeout, ConnectionRefusedError, ConnectionResetError, OSError) as e:
+            self._handle_network_error(e, "set_file_priorities")
+        except (client.Fault, Exception) as e:
+            self._handle_xmlrpc_error(e, "set file priorities")
 
     def _download_torrent_file(self, url, user_id: Optional[str] = None):
         """Download a .torrent file from a URL to a temporary file."""
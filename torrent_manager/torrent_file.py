@@ -11,6 +11,7 @@ Key features:
 - Create magnet links from torrent files
 - Check if a torrent is private (is_private property)
 - Add trackers to public torrents (add_trackers method)
+- Verify downloaded data against the piece hashes (verify method)
 
 Custom exceptions:
 - TorrentFileError: Base exception for all torrent file errors
@@ -20,7 +21,8 @@ Custom exceptions:
 
 import hashlib
 import os
-from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
 import bencodepy
 
@@ -83,6 +85,12 @@ class TorrentFile:
         # Check for 'files' key
         self.is_multi_file = 'files' in self.info
 
+        # Derived values computed once; the info dict is never modified after parsing
+        self._info_hash = None
+        self._pieces = memoryview(self.info.get('pieces', b''))
+        self._num_pieces = len(self._pieces) // 20
+        self._size = None
+
     def _normalize_dict(self, d):
         """Recursively convert byte keys to strings, preserving byte values needed for hashing."""
         if isinstance(d, dict):
@@ -116,14 +124,17 @@ class TorrentFile:
             return [self.info['name']]
 
     def info_hash(self):
-        # Use raw info dict to ensure hash is correct (needs original bytes)
-        return hashlib.sha1(bencodepy.encode(self._raw_info)).hexdigest().upper()
+        # Use raw info dict to ensure hash is correct (needs original bytes).
+        # Cached because bencoding and hashing the info dict is O(size of info).
+        if self._info_hash is None:
+            self._info_hash = hashlib.sha1(bencodepy.encode(self._raw_info)).hexdigest().upper()
+        return self._info_hash
 
     def size(self):
-        if self.is_multi_file:
-            return sum(file['length'] for file in self.info['files'])
-        else:
-            return self.info['length']
+        # Cached because multi-file torrents sum over every file entry
+        if self._size is None:
+            self._size = sum(self.sizes())
+        return self._size
 
     def sizes(self):
         if self.is_multi_file:
@@ -135,10 +146,96 @@ class TorrentFile:
         return self.info['piece length']
 
     def num_pieces(self):
-        return len(self.info['pieces']) // 20
+        return self._num_pieces
 
     def piece_hash(self, piece_index):
-        return self.info['pieces'][piece_index*20:(piece_index+1)*20].hex()
+        # Slicing the memoryview avoids copying the 20-byte digest before hex()
+        return self._pieces[piece_index*20:(piece_index+1)*20].hex()
+
+    def iter_piece_hashes(self):
+        """Yield the hex SHA1 digest of every piece, in order."""
+        pieces = self._pieces
+        for offset in range(0, self._num_pieces * 20, 20):
+            yield pieces[offset:offset + 20].hex()
+
+    def verify(self, base_path, max_workers=None):
+        """
+        Check downloaded data under base_path against the piece hashes.
+
+        base_path is the directory containing the torrent's file (single-file)
+        or its top-level folder (multi-file). Pieces are split into contiguous
+        ranges hashed on a thread pool; hashlib releases the GIL while hashing
+        large buffers, so ranges are verified in parallel.
+
+        Returns:
+            Sorted list of piece indices that are missing or do not match.
+        """
+        if not self._num_pieces:
+            return []
+
+        spans = []
+        offset = 0
+        if self.is_multi_file:
+            root = os.path.join(base_path, self.info['name'])
+            for file in self.info['files']:
+                # Path components inside lists are left as bytes by _normalize_dict
+                parts = [p.decode('utf-8', errors='ignore') if isinstance(p, bytes) else p
+                         for p in file['path']]
+                spans.append((os.path.join(root, *parts), offset, file['length']))
+                offset += file['length']
+        else:
+            spans.append((os.path.join(base_path, self.info['name']), 0, self.info['length']))
+
+        workers = max_workers or os.cpu_count() or 1
+        per_worker = -(-self._num_pieces // workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._verify_range, spans, start,
+                                min(start + per_worker, self._num_pieces))
+                for start in range(0, self._num_pieces, per_worker)
+            ]
+            return [index for future in futures for index in future.result()]
+
+    def _verify_range(self, spans, start, stop):
+        """Hash pieces [start, stop) sequentially, keeping file handles open."""
+        piece_length = self.piece_length()
+        handles = {}
+        failed = []
+        try:
+            for index in range(start, stop):
+                data = self._read_range(spans, index * piece_length, piece_length, handles)
+                expected = self._pieces[index*20:(index+1)*20]
+                if data is None or hashlib.sha1(data).digest() != expected:
+                    failed.append(index)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return failed
+
+    @staticmethod
+    def _read_range(spans, offset, length, handles):
+        """Read length bytes at offset across the concatenated files, or None if short."""
+        chunks = []
+        end_offset = offset + length
+        for path, start, size in spans:
+            end = start + size
+            if size == 0 or end <= offset:
+                continue
+            if start >= end_offset:
+                break
+            handle = handles.get(path)
+            if handle is None:
+                try:
+                    handle = handles[path] = open(path, 'rb')
+                except OSError:
+                    return None
+            handle.seek(max(offset - start, 0))
+            wanted = min(end, end_offset) - max(start, offset)
+            data = handle.read(wanted)
+            if len(data) != wanted:
+                return None
+            chunks.append(data)
+        return b''.join(chunks)
 
     def trackers(self):
         if 'announce-list' in self.torrent_data:
@@ -182,13 +279,16 @@ class TorrentFile:
         return data
 
     def magnet_link(self):
-        params = {
-            'xt': f"urn:btih:{self.info_hash()}",
-            'dn': self.info['name'],
-        }
-        for i, tracker in enumerate(self.trackers()):
-            params[f'tr.{i}'] = tracker
-        return f"magnet:?{urlencode(params)}"
+        """
+        Build a magnet URI for this torrent.
+
+        The query is assembled directly: xt is plain ASCII and is left
+        unencoded (as in MagnetLink.to_uri), and each tracker becomes a
+        repeated 'tr' parameter.
+        """
+        parts = [f"xt=urn:btih:{self.info_hash()}", f"dn={quote(self.info['name'], safe='')}"]
+        parts.extend(f"tr={quote(tracker, safe='')}" for tracker in self.trackers())
+        return f"magnet:?{'&'.join(parts)}"
 
     def validate(self):
         # Top-level keys